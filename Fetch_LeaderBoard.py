@@ -1,49 +1,95 @@
-import requests
+import argparse
 import json
+import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-import os
-from dotenv import load_dotenv
-load_dotenv() # Charge le fichier .env
-API_KEY = os.getenv("RIOT_API_KEY")
-OUTPUT_FILE = "leaderboard_data.json"
+from data_files import LADDER_SCHEMA, ParquetAppender, parquet_available
+from ladder_history import LadderHistory
+from riot_client import get_client
+
+OUTPUT_FILE = "leaderboard_data.json" # Export JSON historique (--json)
+PARQUET_FILE = "leaderboard_data.parquet" # Fichier lu par app.py
+ENTRIES_FILE = "leaderboard_entries.ndjson" # Écrit au fil de l'eau pendant le scan
 REGIONS = {"EUW": "euw1", "KR": "kr"}
+# Plateformes scannées en mode --full
+ALL_REGIONS = {"EUW": "euw1", "EUNE": "eun1", "KR": "kr", "NA": "na1", "BR": "br1", "JP": "jp1", "TR": "tr1"}
+PLATFORM_ROUTING = {
+    "euw1": "europe", "eun1": "europe", "tr1": "europe", "ru": "europe",
+    "kr": "asia", "jp1": "asia",
+    "na1": "americas", "br1": "americas", "la1": "americas", "la2": "americas", "oc1": "americas",
+}
+TIERS = [ # Du plus haut au plus bas : l'ordre définit le rang dans la région
+    ("CHALLENGER", "challengerleagues"),
+    ("GRANDMASTER", "grandmasterleagues"),
+    ("MASTER", "masterleagues"),
+]
+TOP_N = 100 # Taille du classement par région (None = pas de limite)
+CHUNK_SIZE = 200 # Joueurs résolus puis écrits sur disque par paquet
+ID_CACHE_FILE = "riot_id_cache.json"
+ID_CACHE_TTL = 7 * 24 * 3600 # Un Riot ID change rarement : on le garde une semaine
+MAX_WORKERS = 10 # Résolutions de noms en parallèle (le budget est géré par riot_client)
+PRIORITY = "ladder" # Classe de priorité des requêtes (riot_client.PRIORITIES)
+
+def safe_request(url, method=None):
+    # Même client (pool, budget, retries) que Fetch_data et app.py
+    return get_client().get_json(url, method=method, priority=PRIORITY)
+
+def load_id_cache():
+    """Cache persistant PUUID / SummonerID -> Riot ID, sans les entrées expirées"""
+    try:
+        with open(ID_CACHE_FILE, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    now = time.time()
+    return {k: v for k, v in cache.items() if now - v["ts"] < ID_CACHE_TTL}
 
-HEADERS = {"X-Riot-Token": API_KEY}
-session = requests.Session()
-session.headers.update(HEADERS)
-
-def safe_request(url):
-    while True:
-        try:
-            resp = session.get(url)
-            if resp.status_code == 200:
-                return resp.json()
-            elif resp.status_code == 429:
-                wait = int(resp.headers.get("Retry-After", 5))
-                print(f"      ⚠️ Pause Rate Limit ({wait}s)...")
-                time.sleep(wait)
-            else:
-                print(f"      ❌ Erreur HTTP {resp.status_code} sur {url}")
-                return None
-        except Exception as e:
-            print(f"      ❌ Exception: {e}")
-            return None
-
-def get_riot_id(region, player_data):
+def save_id_cache(cache):
+    tmp_path = ID_CACHE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, ID_CACHE_FILE)
+
+def get_riot_id(region, player_data, cache=None):
     """
     Récupère le Riot ID (Nom#Tag) de la manière la plus efficace possible.
     S'adapte selon si on a le PUUID ou le SummonerID.
+    Si un cache est fourni, il est consulté d'abord puis complété.
     """
     puuid = player_data.get("puuid")
     summoner_id = player_data.get("summonerId")
+    keys = [f"puuid:{puuid}" if puuid else None, f"summoner:{summoner_id}" if summoner_id else None]
+    keys = [k for k in keys if k]
+
+    if cache is not None:
+        for k in keys:
+            if k in cache: return cache[k]["name"]
+
+    name = fetch_riot_id(region, puuid, summoner_id)
+    if cache is not None and name != "Unknown Player":
+        for k in keys:
+            cache[k] = {"name": name, "ts": time.time()}
+    return name
+
+def resolve_riot_ids(region, players, cache):
+    """Riot ID de chaque joueur (même ordre) : cache d'abord, les absents en parallèle"""
+    misses = [p for p in players if not any(
+        k in cache for k in (f"puuid:{p.get('puuid')}", f"summoner:{p.get('summonerId')}"))]
+    print(f"   🗂️ {len(players) - len(misses)} noms en cache, {len(misses)} à résoudre...")
+    # Les hits reviennent tout de suite, seuls les absents partent sur le réseau
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        return list(executor.map(lambda p: get_riot_id(region, p, cache), players))
+
+def fetch_riot_id(region, puuid, summoner_id):
     
     # CAS 1 : On a déjà le PUUID (Le top du top, merci Riot)
     if puuid:
-        routing = "europe" if region == "euw1" else "asia"
+        routing = PLATFORM_ROUTING.get(region, "europe")
         url_acc = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
-        data_acc = safe_request(url_acc)
+        data_acc = safe_request(url_acc, method="account-v1:by-puuid")
         if data_acc:
             return f"{data_acc['gameName']}#{data_acc['tagLine']}"
             
@@ -51,78 +97,179 @@ def get_riot_id(region, player_data):
     elif summoner_id:
         # Étape A : SummonerID -> PUUID
         url_sum = f"https://{region}.api.riotgames.com/lol/summoner/v4/summoners/{summoner_id}"
-        data_sum = safe_request(url_sum)
+        data_sum = safe_request(url_sum, method="summoner-v4:by-id")
         
         if data_sum and "puuid" in data_sum:
             puuid = data_sum["puuid"]
             # Étape B : PUUID -> Riot ID
-            routing = "europe" if region == "euw1" else "asia"
+            routing = PLATFORM_ROUTING.get(region, "europe")
             url_acc = f"https://{routing}.api.riotgames.com/riot/account/v1/accounts/by-puuid/{puuid}"
-            data_acc = safe_request(url_acc)
+            data_acc = safe_request(url_acc, method="account-v1:by-puuid")
             if data_acc:
                 return f"{data_acc['gameName']}#{data_acc['tagLine']}"
     
     # Si tout échoue
     return "Unknown Player"
 
-def main():
-    print("🚀 DÉMARRAGE DU SCANNER LADDER PRO V2\n")
-    
-    global_data = {
-        "last_update": datetime.now().strftime("%Y-%m-%d %H:%M"),
-        "regions": {}
+def fetch_league(code, tier, endpoint):
+    """Entrées d'une ligue (Challenger, GM ou Master), triées par LP décroissants"""
+    url = f"https://{code}.api.riotgames.com/lol/league/v4/{endpoint}/by-queue/RANKED_SOLO_5x5"
+    data = safe_request(url, method=f"league-v4:{endpoint}")
+    if not data: 
+        print(f"   ❌ Impossible de récupérer la ligue {tier} ({code}).")
+        return []
+    entries = data["entries"]
+    entries.sort(key=lambda x: x['leaguePoints'], reverse=True)
+    return entries
+
+def build_entry(region_name, tier, rank, p, real_name):
+    wins = p.get("wins", 0)
+    losses = p.get("losses", 0)
+    total = wins + losses
+    wr = (wins/total*100) if total > 0 else 0
+    return {
+        "region": region_name,
+        "rank": rank,
+        "name": real_name,
+        "puuid": p.get("puuid"),
+        "lp": p["leaguePoints"],
+        "winrate": round(wr, 1),
+        "wins": wins,
+        "losses": losses,
+        "tier": tier
     }
 
-    for name, code in REGIONS.items():
-        print(f"🌍 Analyse {name} ({code})...")
-        
-        url = f"https://{code}.api.riotgames.com/lol/league/v4/challengerleagues/by-queue/RANKED_SOLO_5x5"
-        data = safe_request(url)
-        
-        if not data: 
-            print("   ❌ Impossible de récupérer la ligue.")
-            continue
-        
-        entries = data["entries"]
-        entries.sort(key=lambda x: x['leaguePoints'], reverse=True)
-        top_players = entries[:100] 
-        
-        processed = []
-        print(f"   ⚙️ Traitement du Top {len(top_players)}...")
-        
-        # DEBUG : Affiche les clés du premier joueur pour comprendre l'erreur
-        if len(top_players) > 0:
-            print(f"   🔍 DEBUG (Clés disponibles) : {list(top_players[0].keys())}")
+def scan_ladder(regions, tiers, top_n, id_cache, entries_path=ENTRIES_FILE):
+    """
+    Scanne toutes les (région, tier) en parallèle et écrit chaque paquet de
+    joueurs résolus dans un NDJSON dès qu'il est prêt.
+    Renvoie le nombre de joueurs écrits par région.
+    """
+    # 1. Listes des ligues : quelques requêtes seulement, toutes en parallèle
+    jobs = [(name, code, tier, endpoint) for name, code in regions.items() for tier, endpoint in tiers]
+    with ThreadPoolExecutor(max_workers=len(jobs) or 1) as executor:
+        leagues = list(executor.map(lambda j: fetch_league(j[1], j[2], j[3]), jobs))
 
-        for i, p in enumerate(top_players):
-            # On passe tout l'objet 'p' à la fonction pour qu'elle se débrouille
-            real_name = get_riot_id(code, p)
-            
-            wins = p.get("wins", 0)
-            losses = p.get("losses", 0)
-            total = wins + losses
-            wr = (wins/total*100) if total > 0 else 0
-            
-            print(f"      [{i+1}] {real_name} ({p['leaguePoints']} LP)")
-            
-            processed.append({
-                "rank": i+1,
-                "name": real_name,
-                "lp": p["leaguePoints"],
-                "winrate": round(wr, 1),
-                "wins": wins,
-                "losses": losses,
-                "tier": "CHALLENGER"
-            })
-            
-            time.sleep(0.05) # Petite pause sécurité
+    # 2. Rang de départ de chaque (région, tier) et coupe au top N
+    tasks = []
+    offsets = {name: 0 for name in regions}
+    for (name, code, tier, _), entries in zip(jobs, leagues):
+        if top_n is not None:
+            entries = entries[:max(top_n - offsets[name], 0)]
+        if entries:
+            tasks.append((name, code, tier, offsets[name], entries))
+        offsets[name] += len(entries)
+    for name, total in offsets.items():
+        print(f"🌍 {name} : {total} joueurs à traiter")
+
+    # 3. Résolution des noms par paquets, écrits au fur et à mesure
+    write_lock = threading.Lock()
+    with open(entries_path, "w", encoding="utf-8") as out:
+        def process(task):
+            name, code, tier, offset, entries = task
+            for start in range(0, len(entries), CHUNK_SIZE):
+                chunk = entries[start:start + CHUNK_SIZE]
+                names = resolve_riot_ids(code, chunk, id_cache)
+                lines = [
+                    json.dumps(build_entry(name, tier, offset + start + i + 1, p, real_name))
+                    for i, (p, real_name) in enumerate(zip(chunk, names))
+                ]
+                with write_lock:
+                    out.write("\n".join(lines) + "\n")
+                    out.flush()
+                print(f"      ↳ {name} {tier} : {start + len(chunk)}/{len(entries)}")
+
+        # Peu de tâches à la fois : chacune a déjà son propre pool de résolution
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            list(executor.map(process, tasks))
+
+    return offsets
+
+def read_region_entries(name, entries_path=ENTRIES_FILE):
+    """Joueurs d'une seule région, triés par rang, relus depuis le NDJSON du scan"""
+    rows = []
+    with open(entries_path, "r", encoding="utf-8") as f:
+        for line in f:
+            entry = json.loads(line)
+            if entry["region"] == name: rows.append(entry)
+    rows.sort(key=lambda e: e["rank"])
+    return rows
+
+def write_leaderboard_json(regions, entries_path=ENTRIES_FILE, output_path=OUTPUT_FILE):
+    """Assemble le JSON historique, une région à la fois pour garder la mémoire bornée"""
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        out.write('{"last_update": %s, "regions": {' % json.dumps(datetime.now().strftime("%Y-%m-%d %H:%M")))
+        for r, name in enumerate(regions):
+            rows = read_region_entries(name, entries_path)
+            for entry in rows: del entry["region"]
+            out.write(("," if r else "") + json.dumps(name) + ": " + json.dumps(rows))
+        out.write("}}")
+    os.replace(tmp_path, output_path)
 
-        global_data["regions"][name] = processed
+def write_leaderboard_parquet(regions, entries_path=ENTRIES_FILE, output_path=PARQUET_FILE):
+    """Même contenu en Parquet : un row group par région"""
+    metadata = {"last_update": datetime.now().strftime("%Y-%m-%d %H:%M")}
+    with ParquetAppender(output_path, LADDER_SCHEMA, metadata) as out:
+        for name in regions:
+            out.write(read_region_entries(name, entries_path))
 
-    print(f"\n💾 Sauvegarde dans '{OUTPUT_FILE}'...")
-    with open(OUTPUT_FILE, "w", encoding="utf-8") as f:
-        json.dump(global_data, f, indent=4)
+def record_history(regions, entries_path=ENTRIES_FILE):
+    """Ajoute le scan à l'historique du ladder (seulement les joueurs qui ont bougé)"""
+    history = LadderHistory()
+    ts = int(time.time() * 1000) # Même horodatage pour toutes les régions du scan
+    try:
+        for name in regions:
+            rows = read_region_entries(name, entries_path)
+            if not rows: continue # Ligue indisponible : surtout ne pas faire "sortir" tout le monde
+            changed = history.append_snapshot(name, rows, ts)
+            print(f"   🕒 {name} : {changed}/{len(rows)} joueurs ont bougé depuis le dernier scan")
+    finally:
+        history.close()
+
+def refresh_ladder(full=False, top_n=TOP_N, as_json=False):
+    """Scan complet + export : utilisé par main() et par le daemon (daemon.py)"""
+    regions = ALL_REGIONS if full else REGIONS
+    tiers = TIERS if full else TIERS[:1]
+
+    metrics = get_client().metrics
+    id_cache = load_id_cache()
+    try:
+        with metrics.phase("scan"):
+            scan_ladder(regions, tiers, top_n, id_cache)
+    finally:
+        # Même en cas de crash, les noms déjà résolus ne sont pas perdus
+        save_id_cache(id_cache)
+
+    with metrics.phase("history"):
+        record_history(regions)
+
+    if not as_json and not parquet_available():
+        print("   ⚠️ pyarrow absent : export en JSON")
+        as_json = True
+
+    with metrics.phase("export"):
+        if as_json:
+            print(f"\n💾 Sauvegarde dans '{OUTPUT_FILE}'...")
+            write_leaderboard_json(regions)
+        else:
+            print(f"\n💾 Sauvegarde dans '{PARQUET_FILE}'...")
+            write_leaderboard_parquet(regions)
+
+def main():
+    parser = argparse.ArgumentParser(description="Scanner du ladder SoloQ")
+    parser.add_argument("--full", action="store_true",
+                        help="Challenger + Grandmaster + Master sur toutes les régions de ALL_REGIONS")
+    parser.add_argument("--top", type=int, default=TOP_N,
+                        help="Joueurs gardés par région (0 = pas de limite)")
+    parser.add_argument("--json", action="store_true",
+                        help=f"Export historique vers '{OUTPUT_FILE}' au lieu du Parquet")
+    args = parser.parse_args()
+
+    print("🚀 DÉMARRAGE DU SCANNER LADDER PRO V2\n")
+    refresh_ladder(args.full, args.top or None, args.json)
     print("✅ Terminé !")
+    print(f"📡 Métriques : {get_client().metrics.export('fetch_leaderboard')}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
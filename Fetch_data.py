@@ -1,197 +1,511 @@
-import requests
-import time
+import argparse
 import json
+import multiprocessing
 import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from dotenv import load_dotenv
-
-<<<<<<< HEAD
-load_dotenv() # Charge le fichier .env
-API_KEY = os.getenv("RIOT_API_KEY")
-=======
-# --- CONFIGURATION ---
-API_KEY = "CLEF_API_A_MODIFIER_XDD" # ⚠️ Remplace par ta vraie clé
->>>>>>> 4e1750ed0dd29bf9be342fce7c8bbb0847522ecc
+
+from data_files import MATCH_SCHEMA, ParquetAppender, parquet_available, write_json
+from match_store import MatchStore, compress_payload, decompress_payload
+from match_frame import REMAKE_MAX_SEC, build_batch_entries, build_owner_rows
+from match_timeline import parse_timeline
+from player_series import PlayerSeries
+from riot_client import configure_client, get_client, split_budget
+from rosters import DEFAULT_ROSTER, ROSTERS_FILE, full_name, load_rosters, work_queue
+
 REGION_ROUTING = "europe" 
 START_DATE = "08/01/2026"
-DATA_FILE_PATH = "esport_data.json" # Fichier de sortie
-
-HEADERS = {
-    "User-Agent": "Mozilla/5.0 (Python Script)",
-    "X-Riot-Token": API_KEY
-}
+DATA_FILE_PATH = "esport_data.json" # Export JSON historique (--json)
+PARQUET_FILE_PATH = "esport_data.parquet" # Fichier de sortie lu par app.py
+MAX_WORKERS = 10 # Requêtes match-v5 en vol simultanément
+EXTRACT_BATCH = 20 # Matchs extraits ensemble, en un seul DataFrame (voir match_frame.py)
+MATCH_TYPE = "ranked" # Filtre serveur des listings : "ranked", "normal"... ("" = toutes les files)
+MATCH_QUEUES = () # Files précises (ex. (420,) : SoloQ seule), prioritaires sur MATCH_TYPE
+CURSOR_OVERLAP = 3600 # s : une partie en cours au dernier listing apparaît après coup
+PRIORITY = "backfill" # Travail de fond : passe après le dashboard, le live et le ladder (riot_client.PRIORITIES)
 
+# Roster par défaut, utilisé seulement sans rosters.json (voir rosters.py)
 TEAM_PLAYERS = [
     {"gameName": "NomDeJoueur", "tagLine": "TagDeJoueur"},
     # Ajoute les autres ici
 ]
 
 # --- 1. LE MOTEUR API ---
-def safe_request(url, params=None):
-    while True:
-        try:
-            response = requests.get(url, headers=HEADERS, params=params)
-            if response.status_code == 200:
-                time.sleep(1.2) # Rate limit friendly
-                return response.json()
-            elif response.status_code == 429:
-                wait = int(response.headers.get("Retry-After", 10))
-                print(f"   ⚠️ Pause Riot : {wait}s...")
-                time.sleep(wait)
-            elif response.status_code == 404:
-                return None
-            else:
-                print(f"   ❌ Erreur {response.status_code} sur {url}")
-                return None
-        except Exception as e:
-            print(f"   ❌ Exception: {e}")
-            return None
+def safe_request(url, params=None, method=None):
+    # Pool, budget et retries sont gérés par le client partagé (riot_client.py)
+    return get_client().get_json(url, params, method, PRIORITY)
 
 def get_puuid(game_name, tag_line):
     url = f"https://{REGION_ROUTING}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-    data = safe_request(url)
+    data = safe_request(url, method="account-v1:by-riot-id")
     return data.get("puuid") if data else None
 
-def get_matches_since(puuid, date_string):
+def match_filters(queues=None, match_type=None):
+    """
+    Filtres serveur de by-puuid/ids, un dict de paramètres par liste à parcourir.
+    L'API n'accepte qu'une file par requête : plusieurs files = plusieurs listes.
+    """
+    queues = MATCH_QUEUES if queues is None else queues
+    match_type = MATCH_TYPE if match_type is None else match_type
+    if queues: return [{"queue": q} for q in queues]
+    return [{"type": match_type}] if match_type else [{}]
+
+def get_matches_since(puuid, date_string, since_ms=None, filters=None):
+    """
+    IDs des matchs du joueur depuis date_string (ou since_ms), pour chaque filtre de match_filters.
+    Renvoie (match_ids, complet) : complet est faux si une page a échoué.
+    """
     date_obj = datetime.strptime(date_string, "%d/%m/%Y")
     start_timestamp = int(date_obj.timestamp())
-    
+    # Refresh incrémental : on repart du curseur (voir discover_player_matches)
+    if since_ms:
+        start_timestamp = max(start_timestamp, since_ms // 1000)
+
+    url = f"https://{REGION_ROUTING}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
     all_match_ids = []
-    start_index = 0
-    print(f"   📅 Recherche matchs depuis {date_string}...")
-    
-    while True:
-        url = f"https://{REGION_ROUTING}.api.riotgames.com/lol/match/v5/matches/by-puuid/{puuid}/ids"
-        params = {"startTime": start_timestamp, "start": start_index, "count": 100}
-        batch = safe_request(url, params)
-        if not batch: break
-        
-        all_match_ids.extend(batch)
-        print(f"      ↳ {len(all_match_ids)} matchs trouvés...")
-        if len(batch) < 100: break
-        start_index += 100
-        
-    return all_match_ids
+    complete = True
+    for extra in filters or match_filters():
+        start_index = 0
+        while True:
+            params = {"startTime": start_timestamp, "start": start_index, "count": 100, **extra}
+            batch = safe_request(url, params, method="match-v5:ids")
+            if batch is None: # Erreur (pas une liste vide) : le curseur ne doit pas avancer
+                complete = False
+                break
+            all_match_ids.extend(batch)
+            if len(batch) < 100: break
+            start_index += 100
+    return list(dict.fromkeys(all_match_ids)), complete
+
+def get_timeline_summary(match_id):
+    """
+    Résumé de la timeline (voir match_timeline.py), lue en flux sans charger le payload.
+    Timeline indisponible (404) : résumé vide, pour ne pas la redemander. Erreur : None.
+    """
+    url = f"https://{REGION_ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}/timeline"
+    status, summary = get_client().fetch(url, method="match-v5:timeline", parse=parse_timeline, priority=PRIORITY)
+    if status == 404: return {"first_blood_ms": None, "frames": {}}
+    return summary if status == 200 else None
 
 # --- 2. EXTRACTION DE DONNÉES (RAW DATA) ---
+def iter_match_data(puuids, match_ids, store=None):
+    """
+    Générateur : (match_id, {puuid: entrée ou None}, (codec, payload compressé) ou None,
+    nouveau résumé de timeline ou None) au fil des téléchargements.
+    Chaque match n'est téléchargé qu'une fois, et une entrée est extraite pour chaque
+    puuid suivi présent dans la partie.
+    Si un store est fourni, les matchs et timelines déjà archivés sont relus sans appel API.
+    Les matchs dont la requête a échoué ne sont pas renvoyés (ils seront retentés au prochain run).
+    """
+    print(f"   ⏳ Extraction détaillée ({len(match_ids)} matchs, {MAX_WORKERS} en parallèle)...")
+    
+    def fetch(match_id):
+        raw = None
+        data = store.get_raw(match_id) if store else None
+        if data is None:
+            url = f"https://{REGION_ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}"
+            data = safe_request(url, method="match-v5:matches")
+            if not data: return None
+            raw = compress_payload(data) # Compression dans le thread, en parallèle des requêtes
+        timeline = new_timeline = None
+        if data["info"]["gameDuration"] >= REMAKE_MAX_SEC:
+            timeline = store.get_timeline(match_id) if store else None
+            if timeline is None:
+                timeline = new_timeline = get_timeline_summary(match_id)
+        return match_id, data, raw, new_timeline, timeline
+
+    def extract(chunk):
+        # Un DataFrame pour tout le paquet : le coût pandas est payé une fois, pas par match
+        entries = build_batch_entries([(match_id, data, timeline) for match_id, data, _, _, timeline in chunk], puuids)
+        for match_id, _, raw, new_timeline, _ in chunk:
+            yield match_id, entries[match_id], raw, new_timeline
+
+    # Les requêtes partent en parallèle, le RateLimiter se charge du rythme.
+    # executor.map rend les résultats dans l'ordre des match_ids.
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        chunk = [] # Au plus EXTRACT_BATCH payloads gardés en mémoire
+        for i, result in enumerate(executor.map(fetch, match_ids)):
+            if i % 20 == 0: print(f"      Extraction {i+1}/{len(match_ids)}...")
+            if result: chunk.append(result)
+            if len(chunk) >= EXTRACT_BATCH:
+                yield from extract(chunk)
+                chunk = []
+        yield from extract(chunk)
+
 def extract_match_data(puuid, match_ids):
     """Récupère les données BRUTES de chaque match pour le JSON"""
     matches_data = []
-    
-    print(f"   ⏳ Extraction détaillée ({len(match_ids)} matchs)...")
-    
-    for i, match_id in enumerate(match_ids):
-        if i % 5 == 0: print(f"      Extraction {i+1}/{len(match_ids)}...")
-            
-        url = f"https://{REGION_ROUTING}.api.riotgames.com/lol/match/v5/matches/{match_id}"
-        data = safe_request(url)
-        if not data: continue
-        
-        info = data["info"]
-        if info["gameDuration"] < 300: continue # Skip remakes
-        
-        player = next((p for p in info["participants"] if p["puuid"] == puuid), None)
-        if not player: continue
-
-        # Calculs préliminaires
-        duration_min = info["gameDuration"] / 60
-        dpm = player["totalDamageDealtToChampions"] / duration_min
-        gpm = player["goldEarned"] / duration_min
-
-        # On structure l'objet match pour le JSON
-        match_entry = {
-            "match_id": match_id,
-            "game_date": info["gameEndTimestamp"], # En ms
-            "duration_sec": info["gameDuration"],
-            "win": player["win"],
-            
-            # Identité
-            "champion": player["championName"],
-            "role": player["teamPosition"], # TOP, JUNGLE, MIDDLE, BOTTOM, UTILITY
-            
-            # Combat
-            "kills": player["kills"],
-            "deaths": player["deaths"],
-            "assists": player["assists"],
-            "kda": player["challenges"].get("kda", 0), # Riot calcule le KDA parfois
-            
-            # Performance
-            "damage_total": player["totalDamageDealtToChampions"],
-            "dpm": round(dpm, 1),
-            "gold_total": player["goldEarned"],
-            "gpm": round(gpm, 1),
-            "cs_total": player["totalMinionsKilled"] + player["neutralMinionsKilled"],
-            "cs_min": round((player["totalMinionsKilled"] + player["neutralMinionsKilled"]) / duration_min, 1),
-            
-            # Vision
-            "vision_score": player["visionScore"],
-            "wards_placed": player["wardsPlaced"],
-            "wards_killed": player["wardsKilled"]
-        }
-        matches_data.append(match_entry)
-
+    for _, entries, _, _ in iter_match_data([puuid], match_ids):
+        if entries.get(puuid): matches_data.append(entries[puuid])
     return matches_data
 
+def build_match_entry(puuid, match_id, data, timeline=None):
+    """
+    Transforme le payload match-v5 en ligne du JSON (None si remake / joueur absent).
+    timeline : résumé de match_timeline.parse_timeline (champs *_diff_* à None sans lui).
+    Pour plusieurs joueurs ou plusieurs matchs, utiliser directement match_frame.
+    """
+    return build_batch_entries([(match_id, data, timeline)], [puuid])[match_id].get(puuid)
+
 # --- 3. FONCTION D'AFFICHAGE CONSOLE (Juste pour le style) ---
 def print_summary_from_data(matches):
-    if not matches: return
+    """Bilan en un seul passage : accepte une liste ou un itérateur sur toute l'historique"""
+    total_games = 0
+    wins = 0
+    champ_counts = {}
+    best_dpm_game = None
+    for m in matches:
+        total_games += 1
+        wins += 1 if m['win'] else 0
+        champ_counts[m['champion']] = champ_counts.get(m['champion'], 0) + 1
+        if best_dpm_game is None or m['dpm'] > best_dpm_game['dpm']:
+            best_dpm_game = m
+    if not total_games: return
     
-    total_games = len(matches)
-    wins = sum(1 for m in matches if m['win'])
     wr = (wins / total_games) * 100
     
     # Trouver Main Champ
-    champ_counts = {}
-    for m in matches:
-        champ_counts[m['champion']] = champ_counts.get(m['champion'], 0) + 1
     main_champ = max(champ_counts, key=champ_counts.get)
     
-    # Trouver Best DPM
-    best_dpm_game = max(matches, key=lambda x: x['dpm'])
-    
     print(f"\n📊 BILAN ({total_games} games) :")
     print(f"   🏆 Winrate Global : {wr:.1f}%")
     print(f"   🛡️ Main Champ     : {main_champ} ({champ_counts[main_champ]} games)")
     print(f"   ⚔️ Top DPM        : {best_dpm_game['champion']} ({best_dpm_game['dpm']} DPM)")
 
 # --- 4. EXÉCUTION & SAUVEGARDE ---
+def export_data(store, players, as_json=False):
+    """
+    Écrit le fichier lu par app.py à partir de la base locale.
+    players : liste de (full_name, puuid) dans l'ordre du roster.
+    Par défaut en Parquet (un row group par joueur), JSON en mode historique.
+    Chaque ligne porte le roster du joueur (table players de la base).
+    """
+    last_update = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    rosters = {puuid: roster for puuid, (roster, _) in store.player_rosters().items()}
+
+    if not as_json and not parquet_available():
+        print("   ⚠️ pyarrow absent : export en JSON")
+        as_json = True
+
+    if as_json:
+        print(f"\n💾 Sauvegarde des données dans '{DATA_FILE_PATH}'...")
+        full_database = {"last_update": last_update, "rosters": {}, "players": {}}
+        for name, puuid in players:
+            full_database["rosters"].setdefault(rosters.get(puuid, DEFAULT_ROSTER), []).append(name)
+            full_database["players"][name] = list(store.iter_player_matches(puuid))
+        write_json(DATA_FILE_PATH, full_database)
+    else:
+        print(f"\n💾 Sauvegarde des données dans '{PARQUET_FILE_PATH}'...")
+        with ParquetAppender(PARQUET_FILE_PATH, MATCH_SCHEMA, {"last_update": last_update}) as out:
+            for name, puuid in players:
+                roster = rosters.get(puuid, DEFAULT_ROSTER)
+                for batch in store.iter_player_batches(puuid):
+                    out.write([dict(m, player=name, roster=roster) for m in batch])
+
+def discover_player_matches(store, puuid, filters=None):
+    """
+    Liste des match_ids à traiter pour un joueur : nouveaux matchs + restes du run précédent.
+    Elle est gardée en checkpoint jusqu'à ce que chaque match soit en base :
+    un run interrompu reprend exactement sur les matchs manquants.
+    """
+    checkpoint_key = f"pending:{puuid}"
+    pending = store.get_checkpoint(checkpoint_key) or []
+    if pending:
+        print(f"   ↩️ Reprise : {len(pending)} matchs restants du run précédent")
+
+    # Curseur : date du dernier listing complet avec les mêmes filtres. Il avance même si le
+    # joueur n'a joué que des parties filtrées ou des remakes (rien de nouveau en base).
+    # Sans curseur (ou filtres changés), on relit tout depuis START_DATE : les matchs déjà
+    # traités sont écartés par known_match_ids, seul le listing est refait.
+    filters = filters or match_filters()
+    filter_key = json.dumps(filters, sort_keys=True)
+    cursor_key = f"cursor:{puuid}"
+    cursor = store.get_checkpoint(cursor_key)
+    since_ms = None
+    if cursor and cursor["filters"] == filter_key:
+        since_ms = (cursor["time"] - CURSOR_OVERLAP) * 1000
+
+    listed_at = int(time.time())
+    # Les matchs en attente sont plus anciens que le curseur : il faut les garder
+    new_ids, complete = get_matches_since(puuid, START_DATE, since_ms, filters)
+    known = store.known_match_ids(puuid)
+    match_ids = [m for m in dict.fromkeys(new_ids + pending) if m not in known]
+    store.set_checkpoint(checkpoint_key, match_ids)
+    if complete:
+        store.set_checkpoint(cursor_key, {"time": listed_at, "filters": filter_key})
+    return match_ids
+
+def discover_matches(store, players, filters=None):
+    """
+    discover_player_matches pour tous les joueurs en même temps (players : {puuid: full_name}).
+    Le rythme est celui du RateLimiter partagé : les listings ne s'attendent plus les uns les autres.
+    """
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        futures = {puuid: executor.submit(discover_player_matches, store, puuid, filters) for puuid in players}
+    wanted = {puuid: future.result() for puuid, future in futures.items()}
+    for puuid, ids in wanted.items():
+        print(f"   📅 {players[puuid]} : {len(ids)} matchs à récupérer")
+    return wanted
+
+def process_roster_matches(store, players, wanted, run_id=None):
+    """
+    Télécharge chaque match une seule fois pour tout le roster (un five-stack = 1 requête,
+    pas 5) et écrit en base une ligne par joueur suivi présent dans la partie.
+    players : {puuid: full_name} ; wanted : {puuid: [match_ids]} issus de discover_player_matches.
+    run_id : run multi-process, les matchs déjà réservés par un autre worker sont laissés à celui-ci
+    (il écrit aussi les lignes de nos joueurs, tous les rosters étant suivis).
+    """
+    unique_ids = list(dict.fromkeys(m for ids in wanted.values() for m in ids))
+    requested = sum(len(ids) for ids in wanted.values())
+    claimed_elsewhere = set()
+    if run_id:
+        claimed = store.claim_matches(run_id, unique_ids)
+        claimed_elsewhere = set(unique_ids) - set(claimed)
+        unique_ids = claimed
+    print(f"\n🔗 {requested} matchs demandés, {len(unique_ids)} uniques à récupérer"
+          + (f" ({len(claimed_elsewhere)} déjà pris par un autre worker)" if claimed_elsewhere else ""))
+
+    saved = 0
+    processed = set()
+    new_games = {} # puuid -> entrées ajoutées, pour les séries de forme
+    for match_id, entries, raw, timeline in iter_match_data(list(players), unique_ids, store):
+        if raw: store.save_raw(match_id, *raw) # Archive complète pour les futures métriques
+        if timeline: store.save_timeline(match_id, timeline)
+        for puuid, match_entry in entries.items():
+            if match_entry:
+                store.save_match(puuid, players[puuid], match_entry)
+                new_games.setdefault(puuid, []).append(match_entry)
+                saved += 1
+            else: # Remake : inutile de le redemander
+                store.mark_ignored(puuid, [match_id])
+        processed.add(match_id)
+    print(f"   💾 {saved} nouvelles lignes en base")
+    update_series(store, players, new_games)
+
+    # Requêtes en échec : gardées pour le prochain run. Un match pris par un autre worker reste
+    # en attente tant qu'il n'est pas en base (worker plus lent, ou en échec) : il sera écarté
+    # par known_match_ids au prochain run s'il a bien été écrit entre-temps.
+    for puuid, ids in wanted.items():
+        known = store.known_match_ids(puuid) if claimed_elsewhere else set()
+        remaining = [m for m in ids if m not in processed and m not in known]
+        if remaining:
+            print(f"   ⚠️ {players[puuid]} : {len(remaining)} matchs à retenter au prochain run")
+            store.set_checkpoint(f"pending:{puuid}", remaining)
+        else:
+            store.clear_checkpoint(f"pending:{puuid}")
+    return saved
+
+def update_series(store, players, new_games, rebuild=False):
+    """
+    Séries de forme (player_series.py) : seules les nouvelles parties sont ajoutées.
+    Un joueur encore absent des séries (premier passage, ou rebuild) repart de tout son historique en base.
+    """
+    series = PlayerSeries()
+    try:
+        if rebuild: series.reset()
+        series.set_players(players)
+        for puuid in players:
+            games = new_games.get(puuid, [])
+            if not series.has_player(puuid):
+                games = list(store.iter_player_matches(puuid))
+            series.add_games(puuid, games)
+    finally:
+        series.close()
+
+def process_roster(store, roster, filters=None, run_id=None):
+    """
+    Un élément de la file de travail : résout les joueurs du roster (puuid gardé en base),
+    puis découvre et télécharge leurs nouveaux matchs. Renvoie les puuids traités.
+    """
+    metrics = get_client().metrics
+    print(f"\n📋 ROSTER : {roster['name']} ({len(roster['players'])} joueurs)")
+    players = {} # puuid -> full_name
+    with metrics.phase("discover"):
+        for p in roster["players"]:
+            name = full_name(p)
+            puuid = store.find_puuid(name) or get_puuid(p['gameName'], p['tagLine'])
+            if not puuid:
+                print(f"   ❌ Joueur introuvable : {name}")
+                continue
+            store.save_player(puuid, name, roster["name"], roster["priority"])
+            players[puuid] = name
+        wanted = discover_matches(store, players, filters) # puuid -> match_ids à traiter
+
+    # Les joueurs d'un même roster d'un coup : les matchs joués ensemble ne sont téléchargés qu'une fois.
+    # Tous les rosters sont suivis : un scrim contre un autre roster remplit aussi ses lignes.
+    with metrics.phase("matches"):
+        process_roster_matches(store, store.tracked_players(), wanted, run_id)
+    return list(wanted)
+
+def _roster_worker(index, api_key, share, queue, filters, run_id):
+    """
+    Process worker : prend les rosters dans la file (déjà triée par priorité) jusqu'à la
+    sentinelle None. Chaque worker a son client HTTP, avec sa clé ou sa part du budget d'une clé partagée.
+    """
+    metrics = configure_client(api_key, share).metrics
+    store = MatchStore()
+    while True:
+        roster = queue.get()
+        if roster is None: break
+        process_roster(store, roster, filters, run_id)
+    store.close()
+    metrics.export(f"fetch_data_w{index}")
+
+def run_roster_workers(queue_items, workers, filters=None):
+    """Répartit la file entre `workers` process (spawn : même comportement sous Windows)"""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    for item in queue_items:
+        queue.put(item)
+    for _ in range(workers):
+        queue.put(None)
+
+    # Les workers se partagent les matchs via la table match_claims : un match commun
+    # à deux rosters traités en parallèle n'est téléchargé qu'une fois
+    run_id = f"{os.getpid()}-{time.time_ns()}"
+    procs = [ctx.Process(target=_roster_worker, args=(i, api_key, share, queue, filters, run_id), name=f"fetch-w{i}")
+             for i, (api_key, share) in enumerate(split_budget(workers))]
+    keys = len({api_key for api_key, _ in split_budget(workers)})
+    print(f"⚙️ {workers} workers, {len(queue_items)} rosters en file, {keys} clé(s) API")
+    for proc in procs:
+        proc.start()
+    for proc in procs:
+        proc.join()
+        if proc.exitcode:
+            # Les matchs non récupérés restent en checkpoint : repris au prochain run
+            print(f"   ⚠️ {proc.name} terminé avec le code {proc.exitcode}")
+    store = MatchStore()
+    store.clear_claims(run_id)
+    store.close()
+
+def backfill_timelines(store):
+    """
+    Télécharge la timeline des matchs déjà en base qui n'en ont pas encore
+    (historique d'avant l'ajout des timelines, ou timeline en échec au run précédent).
+    Les payloads match viennent de l'archive : une seule requête par match.
+    """
+    match_ids = store.missing_timelines()
+    if not match_ids: return 0
+    players = {puuid: player for player, puuid in store.list_players()}
+    print(f"\n🕒 Timelines manquantes : {len(match_ids)} matchs")
+    done = 0
+    for match_id, entries, _, timeline in iter_match_data(list(players), match_ids, store):
+        if not timeline: continue
+        store.save_timeline(match_id, timeline)
+        store.save_matches([(puuid, players[puuid], entry) for puuid, entry in entries.items() if entry])
+        done += 1
+    print(f"   💾 {done} timelines ajoutées")
+    return done
+
+def _reextract_batch(batch):
+    """
+    Worker (process séparé) : recalcule les entrées d'un paquet de payloads archivés.
+    Tout le paquet passe en un seul DataFrame (calculs vectorisés, voir match_frame.py).
+    """
+    matches, owners = [], []
+    for match_id, codec, blob, timeline, match_owners in batch:
+        matches.append((match_id, decompress_payload(codec, blob), timeline))
+        owners += [(match_id, puuid, player) for puuid, player in match_owners]
+    return build_owner_rows(matches, owners)
+
+def reextract_all(store, workers=None):
+    """
+    Recalcule toutes les lignes de la base depuis l'archive, sans aucun appel API.
+    Les paquets sont décompressés / extraits sur tous les cœurs (ProcessPool).
+    """
+    workers = workers or os.cpu_count()
+    print(f"♻️ Ré-extraction depuis l'archive ({workers} process)...")
+    total = 0
+    pending = deque()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Fenêtre de paquets en vol bornée : l'archive n'est jamais chargée en entier
+        for batch in store.iter_raw_batches():
+            pending.append(executor.submit(_reextract_batch, batch))
+            if len(pending) < workers * 2: continue
+            rows = pending.popleft().result()
+            store.save_match_rows(rows)
+            total += len(rows)
+            print(f"      ↳ {total} lignes recalculées...")
+        while pending:
+            rows = pending.popleft().result()
+            store.save_match_rows(rows)
+            total += len(rows)
+    print(f"      ↳ {total} lignes recalculées")
+    return total
+
 def main():
-    print("🚀 DÉMARRAGE DE L'ANALYSEUR ESPORT (Mode JSON)\n")
-    
-    # Structure finale du JSON
-    full_database = {
-        "last_update": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "players": {}
-    }
-    
-    for p in TEAM_PLAYERS:
-        full_name = f"{p['gameName']}#{p['tagLine']}"
-        print(f"👤 JOUEUR : {full_name}")
-        
-        puuid = get_puuid(p['gameName'], p['tagLine'])
-        if not puuid: continue
-            
-        match_ids = get_matches_since(puuid, START_DATE)
-        if not match_ids: continue
-            
-        # Récupération des données brutes
-        player_matches = extract_match_data(puuid, match_ids)
-        
-        # Ajout au dictionnaire global
-        full_database["players"][full_name] = player_matches
-        
-        # Affichage console pour vérifier que tout va bien
-        print_summary_from_data(player_matches)
-        print("-" * 50)
-        
-    # Sauvegarde dans le fichier JSON
-    print(f"\n💾 Sauvegarde des données dans '{DATA_FILE_PATH}'...")
+    parser = argparse.ArgumentParser(description="Récupération des matchs du roster")
+    parser.add_argument("--json", action="store_true",
+                        help=f"Export historique vers '{DATA_FILE_PATH}' au lieu du Parquet")
+    parser.add_argument("--reextract", action="store_true",
+                        help="Recalcule les stats depuis l'archive des payloads (hors ligne), puis exporte")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Nombre de process : rosters récupérés en parallèle (défaut : 1), "
+                             "ou --reextract (défaut : tous les cœurs)")
+    parser.add_argument("--rosters", default=ROSTERS_FILE,
+                        help=f"Fichier de configuration des rosters (défaut : '{ROSTERS_FILE}', sinon TEAM_PLAYERS)")
+    parser.add_argument("--queues", default=None,
+                        help="Files à lister, séparées par des virgules (ex. 420,440). "
+                             f"Défaut : type '{MATCH_TYPE}'")
+    parser.add_argument("--all-queues", action="store_true",
+                        help="Liste toutes les files (ARAM, normales...), sans filtre serveur")
+    parser.add_argument("--backfill-timelines", action="store_true",
+                        help="Récupère aussi la timeline des matchs déjà en base qui n'en ont pas")
+    args = parser.parse_args()
+
+    if args.reextract:
+        store = MatchStore()
+        reextract_all(store, args.workers)
+        # Les stats ont pu changer : séries recalculées depuis la base
+        update_series(store, {puuid: player for player, puuid in store.list_players()}, {}, rebuild=True)
+        export_data(store, store.list_players(), as_json=args.json)
+        print("✅ Sauvegarde réussie !")
+        store.close()
+        return
+
+    print("🚀 DÉMARRAGE DE L'ANALYSEUR ESPORT\n")
+    metrics = get_client().metrics
+    store = MatchStore()
+    rosters = load_rosters(args.rosters, TEAM_PLAYERS)
+    queue_items = work_queue(rosters)
+    queues = [int(q) for q in args.queues.split(",")] if args.queues else None
+    filters = match_filters(queues, "" if args.all_queues else None)
+
+    workers = min(args.workers or 1, len(queue_items))
+    if workers > 1:
+        run_roster_workers(queue_items, workers, filters)
+    else:
+        for roster in queue_items:
+            process_roster(store, roster, filters)
+    if args.backfill_timelines:
+        with metrics.phase("timelines"):
+            backfill_timelines(store)
+
+    # Export dans l'ordre des rosters (priorité), puis du fichier de config
+    exported_players = []
+    for item in queue_items:
+        for p in item["players"]:
+            name = full_name(p)
+            puuid = store.find_puuid(name)
+            if not puuid or not store.latest_game_date(puuid): continue
+            exported_players.append((name, puuid))
+
+            # Affichage console pour vérifier que tout va bien
+            print(f"\n👤 {name}")
+            print_summary_from_data(store.iter_player_matches(puuid))
+            print("-" * 50)
+
+    # L'export contient tout l'historique, pas seulement le delta
     try:
-        with open(DATA_FILE_PATH, "w", encoding="utf-8") as f:
-            json.dump(full_database, f, indent=4)
+        with metrics.phase("export"):
+            export_data(store, exported_players, as_json=args.json)
         print("✅ Sauvegarde réussie !")
     except Exception as e:
         print(f"❌ Erreur sauvegarde : {e}")
+    store.close()
+    print(f"📡 Métriques : {metrics.export('fetch_data')}")
 
 if __name__ == "__main__":
     main()
@@ -1,14 +1,31 @@
 import streamlit as st
 import pandas as pd
-import json
-import plotly.express as px
-import requests  # NOUVEAU : Indispensable pour l'API
-from datetime import datetime
+import numpy as np
+import math
 import os
-from dotenv import load_dotenv
+import plotly.express as px
+from datetime import datetime, timedelta
+
+from dashboard_data import (
+    data_version, day_ms, downsample, ladder_version, load_data, load_form, load_ladder, load_ladder_region,
+    load_lp_history, load_movers, load_player_matches, period_start, player_bounds, player_stats, series_version,
+)
+from ladder_history import HISTORY_PATH
+from live_poller import LivePoller
+from player_series import SERIES_PATH
+from request_metrics import histogram_quantile, load_exported
+
+QUEUE_NAMES = {420: "SoloQ", 440: "Flex", 400: "Normale (draft)", 430: "Normale (blind)",
+               490: "Partie rapide", 450: "ARAM", 700: "Clash", 0: "Custom"}
+HISTORY_PAGE_SIZE = 50 # Lignes envoyées au navigateur par page de l'historique
 
-load_dotenv() # Charge le fichier .env
-API_KEY = os.getenv("RIOT_API_KEY")
+# Périodes proposées pour l'historique du ladder (jours, None = tout)
+HISTORY_PERIODS = {"24 h": 1, "7 jours": 7, "30 jours": 30, "Tout": None}
+# Page "Comparaison" : fenêtres et stats des séries précalculées (player_series.py)
+FORM_WINDOWS = {"10 games": "10", "20 games": "20", "Cumul": "all"}
+FORM_STATS = {"winrate": "Winrate (%)", "dpm": "DPM", "cs_min": "CS/min", "kda": "KDA"}
+RELOAD_CHECK_SECONDS = 15 # Fréquence de détection des nouveaux fichiers de données
+LIVE_REFRESH_SECONDS = 2 # Relecture du statut live dans la sidebar (mémoire du poller, pas d'appel réseau)
 # --- CONFIGURATION DE LA PAGE ---
 st.set_page_config(
     page_title="LoL Esport Dashboard",
@@ -17,73 +34,93 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-# --- FONCTIONS UTILITAIRES ---
-@st.cache_data
-def load_data():
-    try:
-        with open("esport_data.json", 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except FileNotFoundError:
-        return None
+@st.fragment(run_every=RELOAD_CHECK_SECONDS)
+def watch_data_files():
+    """
+    Tourne en boucle dans chaque onglet ouvert : si un fetcher a publié un nouveau
+    fichier, on relance la page (les caches sont indexés sur la version des fichiers).
+    """
+    versions = (data_version(), ladder_version(), series_version())
+    if "data_versions" not in st.session_state:
+        st.session_state.data_versions = versions
+    elif st.session_state.data_versions != versions:
+        st.session_state.data_versions = versions
+        st.rerun()
 
 # --- CHARGEMENT DES DONNÉES ---
-raw_data = load_data()
+raw_data = load_data(data_version())
 
 # --- SIDEBAR (PARAMÈTRES & LIVE CHECK) ---
 st.sidebar.title("🎛️ Dashboard LoL")
 st.sidebar.image("https://upload.wikimedia.org/wikipedia/commons/thumb/2/2a/LoL_Icon_Render.png/640px-LoL_Icon_Render.png", width=100)
+with st.sidebar:
+    watch_data_files()
 
 # 1. Sélection du joueur (On en a besoin pour tout le monde)
 selected_player = None
 if raw_data:
     st.sidebar.caption(f"📅 Data du : {raw_data.get('last_update', '?')}")
-    players_list = list(raw_data["players"].keys())
-    selected_player = st.sidebar.selectbox("Joueur", players_list)
+    rosters = raw_data["rosters"]
+    # Roster d'abord (seulement s'il y en a plusieurs), puis joueur du roster
+    roster = st.sidebar.selectbox("Roster", list(rosters)) if len(rosters) > 1 else next(iter(rosters), None)
+    selected_player = st.sidebar.selectbox("Joueur", rosters.get(roster, []))
 else:
     st.sidebar.error("❌ Lance 'dev/Fetch_data.py' d'abord !")
 
 # 2. Navigation
-page = st.sidebar.radio("Navigation", ["🔍 Analyse Joueur", "🌍 Top Ladder (EUW/KR)"])
+page = st.sidebar.radio("Navigation", ["🔍 Analyse Joueur", "👥 Comparaison", "🌍 Top Ladder", "📡 Métriques"])
 
 st.sidebar.markdown("---")
 
-# 3. Bouton "Live Game" (Bonus)
-if st.sidebar.button("🔴 Vérifier si en jeu ?"):
+# 3. Statut "Live Game" (poller en arrière-plan, lecture instantanée)
+@st.cache_resource
+def get_live_poller():
+    """Un seul poller par serveur Streamlit, partagé par tous les onglets ouverts"""
+    poller = LivePoller()
+    poller.start()
+    return poller
+
+@st.cache_resource
+def track_live_players(version):
+    """
+    Le poller suit tous les rosters, mis à jour une fois par version des données :
+    une session ne réécrit jamais sa liste (le roster choisi ne filtre que l'affichage).
+    """
+    data = load_data(version)
+    players = list(dict.fromkeys(p for roster_players in data["rosters"].values() for p in roster_players))
+    get_live_poller().set_players(players)
+
+def live_label(status):
+    if status is None:
+        return "⏳ Vérification en cours..."
+    if status["error"]:
+        return f"⚠️ {status['error']}"
+    return f"⚔️ EN JEU ! ({status['mode']})" if status["in_game"] else "💤 Ne joue pas."
+
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def live_status(selected_player, roster_players):
+    """
+    Relu toutes les LIVE_REFRESH_SECONDS sans relancer la page : le résultat d'une
+    vérification lancée en fond (request_check) s'affiche dès qu'il arrive.
+    """
+    live_poller = get_live_poller()
     if selected_player:
-        load_dotenv() # Charge le fichier .env
-        API_KEY = os.getenv("RIOT_API_KEY")
-        HEADERS = {"X-Riot-Token": API_KEY}
-        
-        # On sépare le Pseudo du Tag (ex: "Kaneki#3008" -> "Kaneki", "3008")
-        try:
-            game_name, tag_line = selected_player.split("#")
-            
-            # A. On récupère le PUUID (appel rapide Account V1)
-            url_account = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
-            res_acc = requests.get(url_account, headers=HEADERS)
-            
-            if res_acc.status_code == 200:
-                puuid = res_acc.json().get("puuid")
-                
-                # B. On regarde le Spectator V5
-                url_spec = f"https://euw1.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{puuid}"
-                res_spec = requests.get(url_spec, headers=HEADERS)
-                
-                if res_spec.status_code == 200:
-                    game_info = res_spec.json()
-                    mode = game_info['gameMode']
-                    st.sidebar.success(f"⚔️ EN JEU ! ({mode})")
-                elif res_spec.status_code == 404:
-                    st.sidebar.info("💤 Le joueur ne joue pas.")
-                else:
-                    st.sidebar.warning(f"Erreur Spectator: {res_spec.status_code}")
-            else:
-                st.sidebar.error("❌ Joueur introuvable (Vérifie la clé API)")
-        except Exception as e:
-            st.sidebar.error(f"Erreur : {e}")
-    else:
-        st.sidebar.warning("Aucun joueur sélectionné.")
+        # Jamais vérifié : vérification prioritaire lancée en fond, "⏳" en attendant
+        status = live_poller.get_status(selected_player)
+        if status is None: live_poller.request_check(selected_player)
+        if status and status["in_game"]:
+            st.success(live_label(status))
+        else:
+            st.info(live_label(status))
+
+    with st.expander("🔴 Roster en jeu"):
+        for player in roster_players:
+            st.write(f"**{player}** : {live_label(live_poller.get_status(player))}")
+
+if raw_data:
+    track_live_players(data_version())
+    with st.sidebar:
+        live_status(selected_player, rosters.get(roster, []))
 
 # =========================================================
 # PAGE 1 : ANALYSE JOUEUR
@@ -93,24 +130,41 @@ if page == "🔍 Analyse Joueur":
         st.warning("Aucune donnée chargée.")
         st.stop()
 
+    st.title(f"📊 Analyse : {selected_player}")
+    version = data_version()
+    bounds = player_bounds(selected_player, version)
+    if not bounds:
+        st.info("Aucun match trouvé pour ce joueur.")
+        st.stop()
+
+    # Filtres appliqués à la lecture des données (voir load_player_matches)
+    first_day, last_day, played_queues = bounds
+    col_dates, col_queues = st.columns([2, 1])
+    dates = col_dates.date_input("Période", (first_day, last_day), min_value=first_day, max_value=last_day)
+    if len(dates) == 0: dates = (first_day, last_day) # Période effacée / en cours de saisie : tout
+    elif len(dates) == 1: dates = (dates[0], last_day) # Sélection de la période en cours
+    queue_labels = {QUEUE_NAMES.get(q, f"File {q}"): q for q in played_queues}
+    picked = col_queues.multiselect("Files", list(queue_labels), default=list(queue_labels))
+
+    # Pas de filtre = même clé de cache que le chargement complet
+    start_ms = day_ms(dates[0]) if dates[0] > first_day else None
+    end_ms = day_ms(dates[1] + timedelta(days=1)) if dates[1] < last_day else None
+    queues = tuple(queue_labels[q] for q in picked) if len(picked) < len(queue_labels) else None
+
     # Récupération des matchs du joueur sélectionné
-    matches = raw_data["players"][selected_player]
-    df = pd.DataFrame(matches)
+    df = load_player_matches(selected_player, version, start_ms, end_ms, queues)
     
-    # Conversion date
     if not df.empty:
-        df['date'] = pd.to_datetime(df['game_date'], unit='ms')
-
-        st.title(f"📊 Analyse : {selected_player}")
+        stats = player_stats(selected_player, version, start_ms, end_ms, queues)
 
         # --- 1. KPIs ---
         col1, col2, col3, col4 = st.columns(4)
-        total_games = len(df)
-        wins = df['win'].sum()
-        winrate = (wins / total_games) * 100
-        avg_kda = df['kda'].mean()
-        avg_dpm = df['dpm'].mean()
-        avg_cs = df['cs_min'].mean()
+        total_games = stats["total_games"]
+        wins = stats["wins"]
+        winrate = stats["winrate"]
+        avg_kda = stats["avg_kda"]
+        avg_dpm = stats["avg_dpm"]
+        avg_cs = stats["avg_cs"]
 
         col1.metric("Winrate", f"{winrate:.1f}%", f"{wins}V - {total_games-wins}D")
         col2.metric("KDA Moyen", f"{avg_kda:.2f}")
@@ -126,13 +180,7 @@ if page == "🔍 Analyse Joueur":
             col_graph1, col_graph2 = st.columns([2, 1])
             with col_graph1:
                 st.subheader("Pool de Champions")
-                champ_stats = df.groupby("champion").agg(
-                    Games=('match_id', 'count'),
-                    Wins=('win', 'sum'),
-                    Avg_DPM=('dpm', 'mean')
-                ).reset_index()
-                champ_stats['Winrate'] = (champ_stats['Wins'] / champ_stats['Games']) * 100
-                champ_stats = champ_stats.sort_values(by="Games", ascending=False)
+                champ_stats = stats["champ_stats"]
                 
                 fig = px.bar(
                     champ_stats, x="champion", y="Games", color="Winrate",
@@ -156,67 +204,167 @@ if page == "🔍 Analyse Joueur":
                     st.write(f"**🛡️ Main:** {most_played['champion']}")
 
         with tab2:
+            # WebGL (scattergl) + sous-échantillonnage : le navigateur reste fluide à plusieurs milliers de games
+            plotted = downsample(df.sort_values(by="game_date"))
+            if len(plotted) < len(df):
+                st.caption(f"📉 {len(plotted)} parties affichées sur {len(df)} (réparties sur toute la période)")
+
             st.subheader("Évolution des Dégâts (DPM)")
             fig2 = px.line(
-                df.sort_values(by="game_date"), x="date", y="dpm", markers=True, 
+                plotted, x="date", y="dpm", markers=True, 
                 color="win", color_discrete_map={True: "green", False: "red"},
                 hover_data=["champion", "kda"],
-                title="DPM par partie"
+                title="DPM par partie", render_mode="webgl"
             )
             st.plotly_chart(fig2, use_container_width=True)
             
             st.subheader("Corrélation Or vs Dégâts")
             fig3 = px.scatter(
-                df, x="gpm", y="dpm", color="champion", size="kda", 
-                hover_name="champion", title="Gold/min vs Dégâts/min"
+                plotted, x="gpm", y="dpm", color="champion", size="kda", 
+                hover_name="champion", title="Gold/min vs Dégâts/min", render_mode="webgl"
             )
             st.plotly_chart(fig3, use_container_width=True)
 
+            # Stats issues de la timeline (absentes des anciens exports)
+            if "gold_diff_10" in df.columns and df["gold_diff_10"].notna().any():
+                st.subheader("Phase de lane (vs adversaire direct)")
+                diff_labels = {"Gold": "gold", "XP": "xp", "CS": "cs"}
+                stat = st.radio("Écart de", list(diff_labels), horizontal=True)
+                key = diff_labels[stat]
+
+                col_a, col_b, col_c = st.columns(3)
+                col_a.metric(f"{stat} @10 moyen", f"{df[f'{key}_diff_10'].mean():+.0f}")
+                col_b.metric(f"{stat} @15 moyen", f"{df[f'{key}_diff_15'].mean():+.0f}")
+                col_c.metric("First blood moyen", f"{df['first_blood_sec'].mean() / 60:.1f} min")
+
+                lane = plotted.melt(
+                    id_vars=["date", "champion", "win"],
+                    value_vars=[f"{key}_diff_10", f"{key}_diff_15"],
+                    var_name="minute", value_name="ecart"
+                ).dropna(subset=["ecart"])
+                lane["minute"] = lane["minute"].str[-2:] + " min"
+                fig4 = px.line(
+                    lane, x="date", y="ecart", color="minute", markers=True,
+                    hover_data=["champion", "win"], title=f"Écart de {stat} avec l'adversaire de lane",
+                    render_mode="webgl"
+                )
+                fig4.add_hline(y=0, line_dash="dot", line_color="grey")
+                st.plotly_chart(fig4, use_container_width=True)
+
+                fb = df.dropna(subset=["first_blood_sec"]).assign(first_blood_min=lambda d: d["first_blood_sec"] / 60)
+                fig5 = px.histogram(fb, x="first_blood_min", nbins=20, title="Minute du first blood")
+                st.plotly_chart(fig5, use_container_width=True)
+
+            # Écarts sur toute la partie avec l'adversaire direct (même poste, équipe adverse)
+            if "dpm_diff" in df.columns and df["dpm_diff"].notna().any():
+                st.subheader("Face à l'adversaire direct")
+                col_a, col_b, col_c, col_d = st.columns(4)
+                col_a.metric("DPM vs adversaire", f"{df['dpm_diff'].mean():+.0f}")
+                col_b.metric("GPM vs adversaire", f"{df['gpm_diff'].mean():+.0f}")
+                col_c.metric("CS/min vs adversaire", f"{df['cs_min_diff'].mean():+.1f}")
+                col_d.metric("Vision vs adversaire", f"{df['vision_diff'].mean():+.1f}")
+
         with tab3:
             st.subheader("Détail des Matchs")
-            display_df = df[[
-                "date", "champion", "win", "kda", "kills", "deaths", "assists", 
+            # Pagination côté serveur : seule la page affichée est formatée et envoyée au navigateur
+            n_pages = max(math.ceil(len(df) / HISTORY_PAGE_SIZE), 1)
+            history_page = st.number_input("Page", min_value=1, max_value=n_pages, value=1, step=1)
+            st.caption(f"{len(df)} matchs, page {history_page}/{n_pages}")
+
+            opponent = ["opponent_champion"] if "opponent_champion" in df.columns else []
+            first = (history_page - 1) * HISTORY_PAGE_SIZE
+            display_df = df.sort_values(by="game_date", ascending=False).iloc[first:first + HISTORY_PAGE_SIZE][[
+                "date", "champion", *opponent, "win", "kda", "kills", "deaths", "assists", 
                 "dpm", "cs_min", "vision_score"
-            ]].copy()
+            ]]
             
-            display_df["win"] = display_df["win"].apply(lambda x: "✅ VICTOIRE" if x else "❌ DÉFAITE")
-            display_df["date"] = display_df["date"].dt.strftime("%d/%m %H:%M")
+            # Formatage vectorisé (pas de fonction Python appelée ligne par ligne)
+            display_df = display_df.assign(
+                win=np.where(display_df["win"], "✅ VICTOIRE", "❌ DÉFAITE"),
+                date=display_df["date"].dt.strftime("%d/%m %H:%M"),
+            )
             
             # Version compatible (sans matplotlib)
             st.dataframe(display_df, use_container_width=True, hide_index=True)
     else:
-        st.info("Aucun match trouvé pour ce joueur.")
+        st.info("Aucun match sur cette période / ces files.")
 
 # =========================================================
-# PAGE 2 : LADDER (CLASSEMENT)
+# PAGE 2 : COMPARAISON DU ROSTER (séries de forme)
 # =========================================================
-elif page == "🌍 Top Ladder (EUW/KR)":
-    st.title("🌍 Classement SoloQ - Top 100")
+elif page == "👥 Comparaison":
+    st.title("👥 Comparaison du roster")
+    if not raw_data:
+        st.warning("Aucune donnée chargée.")
+        st.stop()
+    if not os.path.exists(SERIES_PATH):
+        st.info("Pas encore de séries : elles se remplissent à chaque lancement de 'Fetch_data.py'.")
+        st.stop()
+
+    all_players = list(dict.fromkeys(p for players in rosters.values() for p in players))
+    picked = st.multiselect("Joueurs", all_players, default=rosters.get(roster, []))
+    col_window, col_stat = st.columns(2)
+    window = FORM_WINDOWS[col_window.radio("Fenêtre", list(FORM_WINDOWS), horizontal=True)]
+    stat = col_stat.radio("Stat", list(FORM_STATS), format_func=FORM_STATS.get, horizontal=True)
+    if not picked:
+        st.stop()
+
+    series, latest = load_form(tuple(picked), series_version())
+    if latest.empty:
+        st.info("Aucune partie pour ces joueurs.")
+        st.stop()
+
+    # Forme actuelle côte à côte : dernière ligne de chaque série
+    form = latest[["player", "games"] + [f"{s}_{window}" for s in FORM_STATS]]
+    form.columns = ["Joueur", "Games"] + list(FORM_STATS.values())
+    form = form.astype({"Games": int}).sort_values(FORM_STATS[stat], ascending=False)
+    st.dataframe(
+        form,
+        column_config={"Winrate (%)": st.column_config.ProgressColumn(format="%.1f%%", min_value=0, max_value=100)},
+        use_container_width=True,
+        hide_index=True
+    )
+
+    plotted = pd.concat([downsample(g) for _, g in series.groupby("player")])
+    fig = px.line(
+        plotted, x="date", y=f"{stat}_{window}", color="player", hover_data=["games"],
+        title=f"{FORM_STATS[stat]} ({'cumul' if window == 'all' else f'{window} dernières games'})",
+        render_mode="webgl"
+    )
+    fig.update_layout(yaxis_title=FORM_STATS[stat], xaxis_title=None)
+    st.plotly_chart(fig, use_container_width=True)
+
+# =========================================================
+# PAGE 3 : LADDER (CLASSEMENT)
+# =========================================================
+elif page == "🌍 Top Ladder":
+    st.title("🌍 Classement SoloQ")
     
-    try:
-        with open("leaderboard_data.json", "r") as f:
-            ladder_data = json.load(f)
-    except FileNotFoundError:
-        st.error("⚠️ Fichier 'leaderboard_data.json' introuvable. Lance 'dev/Fetch_leaderboard.py' !")
+    ladder_data = load_ladder(ladder_version())
+    if not ladder_data:
+        st.error("⚠️ Fichier 'leaderboard_data.parquet' introuvable. Lance 'dev/Fetch_leaderboard.py' !")
         st.stop()
         
     st.caption(f"Dernière MàJ : {ladder_data.get('last_update', '?')}")
     
-    region = st.selectbox("Choisir la région", ["EUW", "KR"])
-    
-    if region in ladder_data["regions"]:
-        data = ladder_data["regions"][region]
-        df_ladder = pd.DataFrame(data)
-        
+    region = st.selectbox("Choisir la région", ladder_data["regions"])
+    if region not in ladder_data["regions"]:
+        st.warning("Pas de données pour cette région.")
+        st.stop()
+
+    df_ladder = load_ladder_region(region, ladder_version())
+    tab_rank, tab_lp, tab_movers = st.tabs(["🏆 Classement", "📈 Trajectoire LP", "🚀 Progressions"])
+
+    with tab_rank:
         # Ajout des médailles
         if not df_ladder.empty:
-            df_ladder.insert(0, "Rank", range(1, len(df_ladder) + 1))
-            def get_medal(rank):
-                return "🥇" if rank == 1 else "🥈" if rank == 2 else "🥉" if rank == 3 else str(rank)
-            df_ladder["Rank"] = df_ladder["Rank"].apply(get_medal)
+            df_rank = df_ladder.copy()
+            medals = np.arange(1, len(df_rank) + 1).astype(str)
+            medals[:3] = ["🥇", "🥈", "🥉"][:len(medals)]
+            df_rank.insert(0, "Rank", medals)
             
             st.dataframe(
-                df_ladder[["Rank", "name", "tier", "lp", "winrate", "wins", "losses"]],
+                df_rank[["Rank", "name", "tier", "lp", "winrate", "wins", "losses"]],
                 column_config={
                     "winrate": st.column_config.ProgressColumn(
                         "Winrate (%)", format="%.1f%%", min_value=0, max_value=100
@@ -229,5 +377,144 @@ elif page == "🌍 Top Ladder (EUW/KR)":
             )
         else:
             st.warning("Liste vide pour cette région.")
-    else:
-        st.warning("Pas de données pour cette région.")
\ No newline at end of file
+
+    # Historique : lu dans ladder_history.db, seulement les joueurs / la période demandés
+    has_history = os.path.exists(HISTORY_PATH)
+
+    with tab_lp:
+        if not has_history:
+            st.info("Pas encore d'historique : il se remplit à chaque lancement de 'Fetch_LeaderBoard.py'.")
+        elif "puuid" not in df_ladder.columns: # Ancien export, sans PUUID
+            st.info("Relance 'Fetch_LeaderBoard.py' pour pouvoir choisir les joueurs.")
+        elif not df_ladder.empty:
+            names = dict(zip(df_ladder["name"], df_ladder["puuid"]))
+            picked = st.multiselect("Joueurs", list(names), default=list(names)[:5], max_selections=10)
+            period = st.radio("Période", list(HISTORY_PERIODS), index=1, horizontal=True, key="lp_period")
+            if picked:
+                lp = load_lp_history(tuple(names[n] for n in picked), period_start(HISTORY_PERIODS[period]), ladder_version())
+                fig = px.line(
+                    lp, x="date", y="lp", color="name", line_shape="hv", markers=True,
+                    hover_data=["rank", "tier", "wins", "losses"], title="LP au fil des scans"
+                )
+                st.plotly_chart(fig, use_container_width=True)
+
+    with tab_movers:
+        if not has_history:
+            st.info("Pas encore d'historique : il se remplit à chaque lancement de 'Fetch_LeaderBoard.py'.")
+        else:
+            period = st.radio("Période", list(HISTORY_PERIODS), index=1, horizontal=True, key="movers_period")
+            movers, (first_scan, _, n_scans) = load_movers(region, period_start(HISTORY_PERIODS[period]), ladder_version())
+            if first_scan:
+                st.caption(f"{n_scans} scans depuis le {datetime.fromtimestamp(first_scan / 1000):%d/%m/%Y %H:%M}")
+            if movers.empty or not movers["lp_diff"].any():
+                st.info("Aucun mouvement sur cette période.")
+            else:
+                columns = {"name": "Joueur", "lp_diff": "LP", "lp_end": "LP actuels",
+                           "rank_start": "Rang début", "rank_end": "Rang fin", "games": "Games"}
+                col_up, col_down = st.columns(2)
+                with col_up:
+                    st.subheader("📈 Plus grosses progressions")
+                    climbers = movers[movers["lp_diff"] > 0].head(10)
+                    st.dataframe(climbers[list(columns)].rename(columns=columns), hide_index=True, use_container_width=True)
+                with col_down:
+                    st.subheader("📉 Plus grosses chutes")
+                    fallers = movers[movers["lp_diff"] < 0].tail(10).iloc[::-1]
+                    st.dataframe(fallers[list(columns)].rename(columns=columns), hide_index=True, use_container_width=True)
+
+                top = pd.concat([climbers, fallers])
+                fig = px.bar(top.sort_values("lp_diff"), x="lp_diff", y="name", orientation="h",
+                             color=top.sort_values("lp_diff")["lp_diff"] > 0, title="LP gagnés / perdus")
+                fig.update_layout(showlegend=False, yaxis_title=None, xaxis_title="LP")
+                st.plotly_chart(fig, use_container_width=True)
+
+# =========================================================
+# PAGE 4 : MÉTRIQUES DES FETCHERS
+# =========================================================
+elif page == "📡 Métriques":
+    st.title("📡 Métriques des requêtes Riot")
+
+    exported = load_exported()
+    if not exported:
+        st.info("Aucune métrique : lance 'Fetch_data.py', 'Fetch_LeaderBoard.py' ou 'daemon.py'.")
+        st.stop()
+
+    source = st.selectbox("Script", list(exported))
+    snap = exported[source]
+    st.caption(f"Dernier export : {snap['updated']} (démarré le {snap['started']}, {snap['uptime_s']:.0f}s)")
+
+    eps = pd.DataFrame(snap["endpoints"])
+    if not eps.empty:
+        eps = eps[eps["requests"] > 0]
+    if eps.empty:
+        st.info("Aucune requête enregistrée.")
+        st.stop()
+
+    buckets = snap["latency_buckets"]
+    eps["endpoint"] = eps["host"] + " · " + eps["method"]
+    eps["avg_ms"] = eps["latency_sum"] / eps["requests"] * 1000
+    eps["p50_ms"] = [histogram_quantile(buckets, c, 0.5) * 1000 for c in eps["latency_buckets"]]
+    eps["p95_ms"] = [histogram_quantile(buckets, c, 0.95) * 1000 for c in eps["latency_buckets"]]
+    eps["errors"] = [sum(n for code, n in s.items() if code not in ("200", "404")) for s in eps["status"]]
+    eps["mb"] = eps["bytes"] / 1024 / 1024
+
+    # --- 1. KPIs ---
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Requêtes", int(eps["requests"].sum()), f"{int(eps['errors'].sum())} erreurs", delta_color="inverse")
+    col2.metric("429 reçus", int(eps["rate_limited"].sum()))
+    col3.metric("Pause Retry-After", f"{eps['retry_after_sleep'].sum():.0f}s")
+    col4.metric("Attente budget", f"{eps['throttle_wait'].sum():.0f}s")
+    col5.metric("Données reçues", f"{eps['mb'].sum():.1f} Mo")
+
+    st.markdown("---")
+
+    # --- 2. OÙ PASSE LE TEMPS ? ---
+    col_left, col_right = st.columns(2)
+    with col_left:
+        st.subheader("Temps des requêtes")
+        split = pd.DataFrame({
+            "poste": ["Réseau (latence HTTP)", "Attente du budget (dont Retry-After)", "Backoff après erreur"],
+            "secondes": [eps["latency_sum"].sum(), eps["throttle_wait"].sum(), eps["backoff_sleep"].sum()],
+        })
+        st.plotly_chart(px.bar(split, x="poste", y="secondes", color="poste"), use_container_width=True)
+        st.caption("Cumulé sur tous les threads : peut dépasser la durée réelle du run.")
+        main_cost = split.sort_values("secondes", ascending=False).iloc[0]
+        st.info(f"Poste dominant côté requêtes : **{main_cost['poste']}**")
+    with col_right:
+        st.subheader("Phases du script")
+        phases = pd.DataFrame(list(snap["phases"].items()), columns=["phase", "secondes"])
+        if phases.empty:
+            st.write("Pas de phase mesurée.")
+        else:
+            st.plotly_chart(px.bar(phases, x="phase", y="secondes"), use_container_width=True)
+            st.caption("Durée réelle de chaque étape (réseau + traitement + écriture des fichiers).")
+
+    # --- 3. DÉTAIL PAR ENDPOINT ---
+    st.subheader("Latences par endpoint")
+    labels = [f"≤{int(b * 1000)}ms" for b in buckets] + [f">{int(buckets[-1] * 1000)}ms"]
+    hist = pd.DataFrame([
+        {"endpoint": ep, "latence": label, "requêtes": n}
+        for ep, counts in zip(eps["endpoint"], eps["latency_buckets"])
+        for label, n in zip(labels, counts)
+    ])
+    fig = px.bar(hist, x="latence", y="requêtes", color="endpoint", barmode="group",
+                 category_orders={"latence": labels})
+    st.plotly_chart(fig, use_container_width=True)
+
+    st.dataframe(
+        eps[["endpoint", "requests", "avg_ms", "p50_ms", "p95_ms", "errors", "rate_limited",
+             "retry_after_sleep", "throttle_wait", "backoff_sleep", "mb"]].round(1),
+        use_container_width=True, hide_index=True
+    )
+
+    st.subheader("Codes HTTP")
+    codes = pd.DataFrame([dict(s, endpoint=ep) for ep, s in zip(eps["endpoint"], eps["status"])]).fillna(0)
+    st.dataframe(codes.set_index("endpoint").astype(int), use_container_width=True)
+
+    # Exports d'avant le scheduler à priorités : pas de section
+    if snap.get("priorities"):
+        st.subheader("Attente du budget par priorité")
+        prio = pd.DataFrame([dict(p, priority=name) for name, p in snap["priorities"].items()])
+        prio["avg_ms"] = prio["wait_sum"] / prio["requests"] * 1000
+        prio["max_ms"] = prio["wait_max"] * 1000
+        st.dataframe(prio[["priority", "requests", "avg_ms", "max_ms"]].round(1), use_container_width=True, hide_index=True)
+        st.caption("interactive > live > ladder > backfill : une requête plus prioritaire passe devant celles qui attendent.")
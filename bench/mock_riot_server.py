@@ -0,0 +1,437 @@
+"""
+Faux serveur Riot pour mesurer les fetchers sans brûler de quota.
+
+Il rejoue des fixtures (account-v1, match-v5 + timelines, league-v4, spectator-v5, summoner-v4),
+applique des limites de débit comme Riot (fenêtres fixes + headers X-*-Rate-Limit)
+et peut injecter de la latence et des 429 avec Retry-After.
+
+Les URLs attendues sont celles de riot_client avec RIOT_API_BASE_URL :
+    http://127.0.0.1:8800/<host>/<chemin Riot>   (ex: /euw1/lol/league/v4/...)
+"""
+import argparse
+import gzip
+import json
+import math
+import os
+import random
+import re
+import sqlite3
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from match_store import decompress_payload
+
+TIERS = ["challengerleagues", "grandmasterleagues", "masterleagues"]
+CHAMPIONS = ["Ahri", "Jinx", "LeeSin", "Garen", "Thresh", "Orianna", "KaiSa", "Viego", "Nautilus", "Azir"]
+POSITIONS = ["TOP", "JUNGLE", "MIDDLE", "BOTTOM", "UTILITY"]
+QUEUE_TYPES = {"ranked": (420, 440), "normal": (400, 430, 490)} # Paramètre type= de by-puuid/ids
+
+# --- 1. FIXTURES ---
+class FixtureSet:
+    """Données rejouées par le serveur, générées ou chargées depuis un dossier / l'archive"""
+    def __init__(self):
+        self.accounts = {}     # puuid -> {"puuid", "gameName", "tagLine"}
+        self.matches = {}      # match_id -> payload match-v5
+        self.match_ids = {}    # puuid -> [match_ids, du plus récent au plus ancien]
+        self.leagues = {}      # "euw1:challengerleagues" -> payload league-v4
+        self.live = {}         # puuid -> payload spectator-v5
+
+    @classmethod
+    def generate(cls, players=5, matches_per_player=300, shared_ratio=0.8, ladder_size=300,
+                 platforms=("euw1", "kr"), seed=42):
+        """Roster fictif qui joue `shared_ratio` de ses games ensemble, + ladders par plateforme"""
+        rng = random.Random(seed)
+        fx = cls()
+        roster = [f"roster-{i}" for i in range(players)]
+        for i, puuid in enumerate(roster):
+            fx.accounts[puuid] = {"puuid": puuid, "gameName": f"Joueur{i}", "tagLine": "BENCH"}
+            fx.match_ids[puuid] = []
+
+        now_ms = int(time.time() * 1000)
+        n_shared = int(matches_per_player * shared_ratio)
+        match_index = 0
+
+        def add_match(members):
+            nonlocal match_index
+            match_id = f"EUW1_{7000000000 + match_index}"
+            end = now_ms - match_index * 45 * 60 * 1000
+            match_index += 1
+            fx.matches[match_id] = fake_match(rng, match_id, end, members)
+            for puuid in members: fx.match_ids[puuid].append(match_id)
+
+        for _ in range(n_shared):
+            add_match(roster[:5])
+        for puuid in roster:
+            for _ in range(matches_per_player - n_shared):
+                add_match([puuid])
+
+        for platform in platforms:
+            for t, tier in enumerate(TIERS):
+                entries = []
+                for i in range(ladder_size):
+                    puuid = f"{platform}-{tier}-{i}"
+                    fx.accounts[puuid] = {"puuid": puuid, "gameName": f"{tier[:2]}{i}", "tagLine": platform}
+                    entries.append({"puuid": puuid, "leaguePoints": rng.randint(0, 1500) + (2 - t) * 1000,
+                                    "wins": rng.randint(100, 400), "losses": rng.randint(100, 400)})
+                fx.leagues[f"{platform}:{tier}"] = {"tier": tier, "queue": "RANKED_SOLO_5x5", "entries": entries}
+
+        fx.live[roster[0]] = {"gameId": 1, "gameMode": "CLASSIC", "participants": []}
+        return fx
+
+    @classmethod
+    def from_store(cls, db_path):
+        """Rejoue les vrais payloads de l'archive (raw_matches de esport_data.db)"""
+        fx = cls()
+        conn = sqlite3.connect(db_path)
+        for match_id, codec, blob in conn.execute("SELECT match_id, codec, payload FROM raw_matches"):
+            data = decompress_payload(codec, blob)
+            fx.matches[match_id] = data
+            for p in data["info"]["participants"]:
+                fx.accounts.setdefault(p["puuid"], {
+                    "puuid": p["puuid"], "gameName": p.get("riotIdGameName", p["puuid"][:8]),
+                    "tagLine": p.get("riotIdTagline", "EUW")
+                })
+                fx.match_ids.setdefault(p["puuid"], []).append(match_id)
+        conn.close()
+        for puuid, ids in fx.match_ids.items():
+            ids.sort(key=lambda m: fx.matches[m]["info"]["gameEndTimestamp"], reverse=True)
+        return fx
+
+    @classmethod
+    def load(cls, directory):
+        fx = cls()
+        with gzip.open(os.path.join(directory, "fixtures.json.gz"), "rt", encoding="utf-8") as f:
+            data = json.load(f)
+        for key in ("accounts", "matches", "match_ids", "leagues", "live"):
+            setattr(fx, key, data[key])
+        return fx
+
+    def save(self, directory):
+        os.makedirs(directory, exist_ok=True)
+        data = {key: getattr(self, key) for key in ("accounts", "matches", "match_ids", "leagues", "live")}
+        with gzip.open(os.path.join(directory, "fixtures.json.gz"), "wt", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def roster(self, size=5):
+        """Les `size` joueurs avec le plus de matchs (ceux qu'un bench de Fetch_data doit suivre)"""
+        ranked = sorted(self.match_ids, key=lambda p: len(self.match_ids[p]), reverse=True)
+        return [self.accounts[p] for p in ranked[:size]]
+
+def fake_match(rng, match_id, end_ms, members):
+    """Payload match-v5 plausible (taille et champs proches d'un vrai)"""
+    duration = rng.randint(1200, 2400)
+    participants = []
+    others = iter(f"random-{rng.getrandbits(48):x}" for _ in range(10))
+    puuids = list(members) + [next(others) for _ in range(10 - len(members))]
+    for i, puuid in enumerate(puuids):
+        team_id = 100 if i < 5 else 200
+        p = {
+            "puuid": puuid,
+            "participantId": i + 1,
+            "teamId": team_id,
+            "teamPosition": POSITIONS[i % 5],
+            "championName": rng.choice(CHAMPIONS),
+            "win": (team_id == 100) == (int(match_id[-1]) % 2 == 0),
+            "kills": rng.randint(0, 15), "deaths": rng.randint(0, 12), "assists": rng.randint(0, 20),
+            "totalDamageDealtToChampions": rng.randint(5000, 45000),
+            "goldEarned": rng.randint(6000, 18000),
+            "totalMinionsKilled": rng.randint(10, 300), "neutralMinionsKilled": rng.randint(0, 150),
+            "visionScore": rng.randint(5, 90), "wardsPlaced": rng.randint(2, 40), "wardsKilled": rng.randint(0, 15),
+            "challenges": {"kda": round(rng.uniform(0.5, 8), 2)},
+        }
+        # Remplissage : un vrai participant a ~150 champs
+        p.update({f"stat{k}": rng.randint(0, 10000) for k in range(120)})
+        participants.append(p)
+    return {
+        "metadata": {"matchId": match_id, "participants": puuids},
+        "info": {
+            "gameEndTimestamp": end_ms, "gameStartTimestamp": end_ms - duration * 1000,
+            "gameDuration": duration, "queueId": rng.choice((420, 420, 420, 440, 400, 450)), "gameMode": "CLASSIC",
+            "participants": participants,
+        },
+    }
+
+def fake_timeline(match):
+    """
+    Timeline match-v5 plausible pour un match (une frame par minute, ~40 champs par
+    participant et des events), régénérée à chaque requête : rien n'est gardé en mémoire.
+    """
+    rng = random.Random(match["metadata"]["matchId"])
+    info = match["info"]
+    ids = [p.get("participantId", i + 1) for i, p in enumerate(info["participants"])]
+    state = {pid: {"gold": 500, "xp": 0, "cs": 0, "jungle": 0} for pid in ids}
+    frames = []
+    first_blood = rng.randint(90, 600) * 1000
+    for minute in range(info["gameDuration"] // 60 + 1):
+        timestamp = minute * 60000 + (rng.randint(0, 80) if minute else 0)
+        participant_frames = {}
+        for pid, st in state.items():
+            if minute:
+                st["gold"] += rng.randint(250, 550)
+                st["xp"] += rng.randint(300, 600)
+                st["cs"] += rng.randint(4, 10)
+                st["jungle"] += rng.randint(0, 2)
+            participant_frames[str(pid)] = {
+                "participantId": pid, "totalGold": st["gold"], "currentGold": rng.randint(0, 1500),
+                "xp": st["xp"], "level": min(st["xp"] // 800 + 1, 18),
+                "minionsKilled": st["cs"], "jungleMinionsKilled": st["jungle"],
+                "position": {"x": rng.randint(0, 14000), "y": rng.randint(0, 14000)},
+                "championStats": {f"stat{k}": rng.randint(0, 3000) for k in range(25)},
+                "damageStats": {f"damage{k}": rng.randint(0, 30000) for k in range(12)},
+            }
+        events = [{"type": rng.choice(["ITEM_PURCHASED", "WARD_PLACED", "SKILL_LEVEL_UP"]),
+                   "timestamp": timestamp - rng.randint(0, 59999) if minute else 0,
+                   "participantId": rng.choice(ids)} for _ in range(rng.randint(10, 30))]
+        if minute and (minute - 1) * 60000 < first_blood <= minute * 60000:
+            events.append({"type": "CHAMPION_KILL", "timestamp": first_blood,
+                           "killerId": rng.choice(ids[:5]), "victimId": rng.choice(ids[5:])})
+        elif minute * 60000 > first_blood and rng.random() < 0.5:
+            events.append({"type": "CHAMPION_KILL", "timestamp": timestamp - 1000,
+                           "killerId": rng.choice(ids), "victimId": rng.choice(ids)})
+        frames.append({"timestamp": timestamp, "participantFrames": participant_frames,
+                       "events": sorted(events, key=lambda e: e["timestamp"])})
+    return {
+        "metadata": {"matchId": match["metadata"]["matchId"], "participants": match["metadata"]["participants"]},
+        "info": {"frameInterval": 60000, "frames": frames,
+                 "participants": [{"participantId": pid, "puuid": p["puuid"]}
+                                  for pid, p in zip(ids, info["participants"])]},
+    }
+
+# --- 2. LIMITES DE DÉBIT (comme Riot : fenêtres fixes) ---
+class FixedWindows:
+    def __init__(self, spec):
+        self.spec = spec
+        self.windows = [[limit, period, 0.0, 0] for limit, period in parse_limits(spec)] # limit, période, début, compteur
+        self.lock = threading.Lock()
+
+    def hit(self):
+        """Compte une requête. Renvoie (ok, retry_after, header_count)"""
+        with self.lock:
+            now = time.time()
+            retry_after = 0
+            for w in self.windows:
+                if now >= w[2] + w[1]:
+                    w[2], w[3] = now, 0
+                if w[3] >= w[0]:
+                    retry_after = max(retry_after, math.ceil(w[2] + w[1] - now))
+            if not retry_after:
+                for w in self.windows: w[3] += 1
+            counts = ",".join(f"{w[3]}:{w[1]}" for w in self.windows)
+            return retry_after == 0, retry_after, counts
+
+def parse_limits(spec):
+    return [(int(c), int(p)) for c, p in (chunk.split(":") for chunk in spec.split(",") if chunk)]
+
+# --- 3. SERVEUR ---
+ROUTES = [
+    ("account-v1:by-riot-id", re.compile(r"^/riot/account/v1/accounts/by-riot-id/([^/]+)/([^/]+)$")),
+    ("account-v1:by-puuid", re.compile(r"^/riot/account/v1/accounts/by-puuid/([^/]+)$")),
+    ("match-v5:ids", re.compile(r"^/lol/match/v5/matches/by-puuid/([^/]+)/ids$")),
+    ("match-v5:matches", re.compile(r"^/lol/match/v5/matches/([^/]+)$")),
+    ("match-v5:timeline", re.compile(r"^/lol/match/v5/matches/([^/]+)/timeline$")),
+    ("league-v4", re.compile(r"^/lol/league/v4/(\w+)/by-queue/RANKED_SOLO_5x5$")),
+    ("summoner-v4:by-id", re.compile(r"^/lol/summoner/v4/summoners/([^/]+)$")),
+    ("spectator-v5", re.compile(r"^/lol/spectator/v5/active-games/by-summoner/([^/]+)$")),
+]
+
+class QuietHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Un client qui ferme en cours de réponse (timeline lue en partie) n'est pas une erreur
+        if isinstance(sys.exc_info()[1], ConnectionError): return
+        super().handle_error(request, client_address)
+
+class MockRiotServer:
+    def __init__(self, fixtures, port=8800, app_limit="500:10,30000:600", method_limit="2000:10",
+                 latency_ms=0, jitter_ms=0, inject_429=0.0, retry_after=1):
+        self.fixtures = fixtures
+        self.app_limit = app_limit
+        self.method_limit = method_limit
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.inject_429 = inject_429
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.app_windows = {}    # host -> FixedWindows
+        self.method_windows = {} # (host, route) -> FixedWindows
+        self.by_riot_id = {(a["gameName"], a["tagLine"]): a for a in fixtures.accounts.values()}
+        self.reset_stats()
+        self.httpd = QuietHTTPServer(("127.0.0.1", port), self._handler())
+        self.port = self.httpd.server_address[1]
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.port}"
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": 0, "by_route": {}, "status": {}, "bytes": 0,
+                          "limit_violations": 0, "injected_429": 0, "first": None, "last": None}
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True, name="mock-riot").start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _windows(self, host, route):
+        with self.lock:
+            if host not in self.app_windows:
+                self.app_windows[host] = FixedWindows(self.app_limit)
+            if (host, route) not in self.method_windows:
+                self.method_windows[(host, route)] = FixedWindows(self.method_limit)
+            return self.app_windows[host], self.method_windows[(host, route)]
+
+    def _record(self, route, status, size):
+        with self.lock:
+            now = time.time()
+            s = self.stats
+            s["requests"] += 1
+            s["by_route"][route] = s["by_route"].get(route, 0) + 1
+            s["status"][str(status)] = s["status"].get(str(status), 0) + 1
+            s["bytes"] += size
+            s["first"] = s["first"] or now
+            s["last"] = now
+
+    def resolve(self, host, path, query):
+        """(route, status, payload) pour une requête"""
+        fx = self.fixtures
+        for route, pattern in ROUTES:
+            m = pattern.match(path)
+            if not m: continue
+            if route == "account-v1:by-riot-id":
+                account = self.by_riot_id.get(m.groups())
+                return route, (200, account) if account else (404, None)
+            if route == "account-v1:by-puuid":
+                account = fx.accounts.get(m.group(1))
+                return route, (200, account) if account else (404, None)
+            if route == "match-v5:ids":
+                ids = fx.match_ids.get(m.group(1), [])
+                start_time = int(query.get("startTime", ["0"])[0]) * 1000
+                queue = query.get("queue", [None])[0]
+                queues = QUEUE_TYPES.get(query.get("type", [None])[0])
+                ids = [i for i in ids if fx.matches[i]["info"]["gameEndTimestamp"] >= start_time
+                       and (queue is None or str(fx.matches[i]["info"].get("queueId")) == queue)
+                       and (queues is None or fx.matches[i]["info"].get("queueId") in queues)]
+                start = int(query.get("start", ["0"])[0])
+                count = int(query.get("count", ["20"])[0])
+                return route, (200, ids[start:start + count])
+            if route == "match-v5:matches":
+                match = fx.matches.get(m.group(1))
+                return route, (200, match) if match else (404, None)
+            if route == "match-v5:timeline":
+                match = fx.matches.get(m.group(1))
+                return route, (200, fake_timeline(match)) if match else (404, None)
+            if route == "league-v4":
+                league = fx.leagues.get(f"{host}:{m.group(1)}")
+                return f"league-v4:{m.group(1)}", (200, league) if league else (404, None)
+            if route == "summoner-v4:by-id":
+                return route, (200, {"id": m.group(1), "puuid": m.group(1)})
+            if route == "spectator-v5":
+                game = fx.live.get(m.group(1))
+                return route, (200, game) if game else (404, None)
+        return "unknown", (404, None)
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1" # keep-alive, comme l'API Riot
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path.startswith("/__bench/"):
+                    return self.control(parsed.path)
+                host, _, path = parsed.path.lstrip("/").partition("/")
+                route, (status, payload) = server.resolve(host, "/" + path, parse_qs(parsed.query))
+                app_w, method_w = server._windows(host, route)
+
+                headers = {}
+                ok_app, retry_app, app_counts = app_w.hit()
+                ok_method, retry_method, method_counts = method_w.hit() if ok_app else (True, 0, "")
+                headers["X-App-Rate-Limit"] = server.app_limit
+                headers["X-App-Rate-Limit-Count"] = app_counts
+                headers["X-Method-Rate-Limit"] = server.method_limit
+                if method_counts: headers["X-Method-Rate-Limit-Count"] = method_counts
+
+                if not (ok_app and ok_method):
+                    # Le client a dépassé une limite annoncée : c'est ce qu'on veut ne jamais voir
+                    with server.lock: server.stats["limit_violations"] += 1
+                    status, payload = 429, {"status": {"message": "Rate limit exceeded", "status_code": 429}}
+                    headers["Retry-After"] = str(max(retry_app, retry_method))
+                    headers["X-Rate-Limit-Type"] = "application" if not ok_app else "method"
+                elif server.inject_429 and random.random() < server.inject_429:
+                    with server.lock: server.stats["injected_429"] += 1
+                    status, payload = 429, {"status": {"message": "Rate limit exceeded", "status_code": 429}}
+                    headers["Retry-After"] = str(server.retry_after)
+                    headers["X-Rate-Limit-Type"] = "service"
+
+                if server.latency_ms or server.jitter_ms:
+                    time.sleep(max(server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms), 0) / 1000)
+
+                body = json.dumps(payload if payload is not None else
+                                  {"status": {"message": "Data not found", "status_code": status}}).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json;charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for k, v in headers.items(): self.send_header(k, v)
+                self.end_headers()
+                server._record(route, status, len(body))
+                self.wfile.write(body)
+
+            def control(self, path):
+                """/__bench/stats et /__bench/reset : pilotage par run_bench.py (hors comptage)"""
+                if path == "/__bench/reset": server.reset_stats()
+                with server.lock:
+                    body = json.dumps(server.stats).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur mock de l'API Riot")
+    parser.add_argument("--port", type=int, default=8800)
+    parser.add_argument("--fixtures", help="Dossier contenant fixtures.json.gz")
+    parser.add_argument("--from-store", help="Rejoue l'archive d'une base (ex: esport_data.db)")
+    parser.add_argument("--save-fixtures", help="Écrit les fixtures utilisées dans ce dossier")
+    parser.add_argument("--app-limit", default="500:10,30000:600")
+    parser.add_argument("--method-limit", default="2000:10")
+    parser.add_argument("--latency", type=float, default=0, help="Latence ajoutée (ms)")
+    parser.add_argument("--jitter", type=float, default=0, help="Variation de latence (± ms)")
+    parser.add_argument("--inject-429", type=float, default=0.0, help="Probabilité d'un 429 injecté")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = FixtureSet.load(args.fixtures)
+    elif args.from_store:
+        fixtures = FixtureSet.from_store(args.from_store)
+    else:
+        fixtures = FixtureSet.generate()
+    if args.save_fixtures:
+        fixtures.save(args.save_fixtures)
+
+    server = MockRiotServer(fixtures, args.port, args.app_limit, args.method_limit,
+                            args.latency, args.jitter, args.inject_429)
+    print(f"🧪 Mock Riot sur {server.base_url} ({len(fixtures.matches)} matchs, {len(fixtures.accounts)} comptes)")
+    print(f"   export RIOT_API_BASE_URL={server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du mock.")
+
+if __name__ == "__main__":
+    main()
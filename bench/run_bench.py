@@ -0,0 +1,313 @@
+"""
+Bench hors ligne : Fetch_data, Fetch_LeaderBoard et chargement du dashboard contre le mock Riot.
+
+    python bench/run_bench.py
+    python bench/run_bench.py --latency 40 --jitter 15 --inject-429 0.01 --sizes 1000,10000
+
+Rapporte requêtes/s, temps total, respect des limites (violations côté serveur),
+mémoire ajoutée par chaque étape (pic RSS moins RSS juste avant) et temps de chargement
+des données du dashboard (les fonctions de dashboard_data.py, celles qu'utilise app.py).
+"""
+import argparse
+import gc
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+from mock_riot_server import FixtureSet, fake_match
+
+RESULTS_FILE = "bench_results.json"
+PROBE_INTERVAL = 0.5 # Secondes entre deux requêtes "interactive" pendant le bench Fetch_data
+
+def current_rss():
+    """RSS du process en octets (Linux : /proc, ailleurs : pic depuis le lancement)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        try:
+            import resource
+            scale = 1 if sys.platform == "darwin" else 1024
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+        except ImportError: # Windows
+            return 0
+
+def measure(func):
+    """
+    (résultat, secondes, Mo ajoutés au RSS au pic) d'un appel.
+    On mesure l'écart avec le RSS pris juste avant l'étape : ce qui est déjà chargé
+    (mock, étapes précédentes) ne masque pas une régression. La mémoire est
+    échantillonnée dans un thread (tracemalloc fausserait les temps).
+    """
+    gc.collect()
+    baseline = current_rss()
+    peak = [baseline]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.01):
+            peak[0] = max(peak[0], current_rss())
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    start = time.perf_counter()
+    try:
+        result = func()
+    finally:
+        elapsed = time.perf_counter() - start
+        done.set()
+        sampler.join()
+    return result, elapsed, (max(peak[0], current_rss()) - baseline) / 1024 / 1024
+
+class MockProcess:
+    """
+    Le mock tourne dans un process à part : son travail (JSON, sleeps) ne
+    partage pas le GIL avec le fetcher mesuré.
+    """
+    def __init__(self, fixtures_dir, args):
+        with socket.socket() as sock: # Port libre
+            sock.bind(("127.0.0.1", 0))
+            self.port = sock.getsockname()[1]
+        self.base_url = f"http://127.0.0.1:{self.port}"
+        self.proc = subprocess.Popen([
+            sys.executable, os.path.join(BENCH_DIR, "mock_riot_server.py"),
+            "--port", str(self.port), "--fixtures", fixtures_dir,
+            "--app-limit", args.app_limit, "--method-limit", args.method_limit,
+            "--latency", str(args.latency), "--jitter", str(args.jitter), "--inject-429", str(args.inject_429),
+        ], stdout=subprocess.DEVNULL)
+        for _ in range(200): # Attend que le serveur réponde
+            try:
+                self.control("stats")
+                return
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError("Le mock Riot n'a pas démarré")
+
+    def control(self, action):
+        with urllib.request.urlopen(f"{self.base_url}/__bench/{action}") as resp:
+            return json.load(resp)
+
+    def reset_stats(self):
+        self.control("reset")
+
+    @property
+    def stats(self):
+        return self.control("stats")
+
+    def stop(self):
+        self.proc.terminate()
+        self.proc.wait()
+
+def server_report(server, elapsed):
+    s = server.stats
+    return {
+        "wall_time_s": round(elapsed, 2),
+        "requests": s["requests"],
+        "requests_per_s": round(s["requests"] / elapsed, 1) if elapsed else None,
+        "by_route": s["by_route"],
+        "status": s["status"],
+        "mb_transferred": round(s["bytes"] / 1024 / 1024, 2),
+        "limit_violations": s["limit_violations"],
+        "injected_429": s["injected_429"],
+        "rate_limits_respected": s["limit_violations"] == 0,
+    }
+
+def probe_interactive(account, done):
+    """
+    Requêtes "interactive" envoyées pendant un fetcher (comme le dashboard) : latences en ms.
+    Elles doivent passer devant le travail de fond (riot_client.PRIORITIES).
+    """
+    from riot_client import get_client
+    url = f"https://europe.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{account['gameName']}/{account['tagLine']}"
+    latencies = []
+    while not done.wait(PROBE_INTERVAL):
+        start = time.perf_counter()
+        # Paramètre unique : pas de fusion avec une requête identique déjà en vol
+        get_client().fetch(url, {"probe": len(latencies)}, "account-v1:by-riot-id", priority="interactive")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+def latency_report(latencies):
+    if not latencies: return None
+    ordered = sorted(latencies)
+    return {"requests": len(ordered), "p50_ms": round(ordered[len(ordered) // 2], 1),
+            "p95_ms": round(ordered[int(len(ordered) * 0.95)], 1), "max_ms": round(ordered[-1], 1)}
+
+# --- 1. FETCHERS ---
+def bench_fetch_data(server, roster):
+    import Fetch_data
+    from match_store import MatchStore
+
+    Fetch_data.TEAM_PLAYERS = [{"gameName": a["gameName"], "tagLine": a["tagLine"]} for a in roster]
+    Fetch_data.START_DATE = "01/01/2000"
+
+    def run():
+        store = MatchStore()
+        players = {}
+        for p in Fetch_data.TEAM_PLAYERS:
+            puuid = Fetch_data.get_puuid(p["gameName"], p["tagLine"])
+            players[puuid] = f"{p['gameName']}#{p['tagLine']}"
+        wanted = Fetch_data.discover_matches(store, players)
+        saved = Fetch_data.process_roster_matches(store, players, wanted)
+        Fetch_data.export_data(store, [(name, puuid) for puuid, name in players.items()])
+        store.close()
+        return saved
+
+    server.reset_stats()
+    done = threading.Event()
+    probes = []
+    prober = threading.Thread(target=lambda: probes.extend(probe_interactive(roster[0], done)), daemon=True)
+    prober.start()
+    try:
+        saved, elapsed, peak = measure(run)
+    finally:
+        done.set()
+        prober.join()
+    report = server_report(server, elapsed)
+    report.update({"rows_saved": saved, "rss_increase_mb": round(peak, 1),
+                   "interactive_latency": latency_report(probes)})
+    return report
+
+def bench_fetch_leaderboard(server, top_n):
+    import Fetch_LeaderBoard
+
+    server.reset_stats()
+    _, elapsed, peak = measure(lambda: Fetch_LeaderBoard.refresh_ladder(full=True, top_n=top_n))
+    report = server_report(server, elapsed)
+    report["rss_increase_mb"] = round(peak, 1)
+    return report
+
+# --- 2. DASHBOARD ---
+def bench_dashboard_load(sizes, players=10):
+    """
+    Chargement de la page "Analyse Joueur" à N matchs : les fonctions de dashboard_data.py
+    appelées par app.py (liste des rosters, bornes, KPIs, matchs du joueur), sans leur cache.
+    """
+    import random
+    import streamlit as st
+    import dashboard_data as dd
+    from data_files import MATCH_SCHEMA, ParquetAppender, write_json
+    from Fetch_data import build_match_entry
+
+    rng = random.Random(0)
+    results = {}
+    for size in sizes:
+        per_player = size // players
+        names = [f"Joueur{i}#BENCH" for i in range(players)]
+        template = [build_match_entry("me", f"EUW1_{i}", fake_match(rng, f"EUW1_{i}", 1_700_000_000_000 - i * 60000, ["me"]))
+                    for i in range(200)]
+
+        def rows_for(name):
+            return [dict(template[i % len(template)], match_id=f"{name}_{i}", player=name, roster="Bench")
+                    for i in range(per_player)]
+
+        # Un dossier par format : dashboard_data lit le Parquet s'il existe, sinon le JSON
+        os.makedirs("dash_parquet", exist_ok=True)
+        os.makedirs("dash_json", exist_ok=True)
+        with ParquetAppender(os.path.join("dash_parquet", dd.DATA_FILE), MATCH_SCHEMA, {"last_update": "bench"}) as out:
+            for name in names: out.write(rows_for(name))
+        write_json(os.path.join("dash_json", dd.LEGACY_DATA_FILE), {"last_update": "bench", "players": {
+            name: [{k: v for k, v in r.items() if k not in ("player", "roster")} for r in rows_for(name)] for name in names}})
+
+        def load_page(directory):
+            cwd = os.getcwd()
+            os.chdir(directory)
+            try:
+                st.cache_data.clear() # Chargement à froid, comme après la publication d'un nouveau fichier
+                version = dd.data_version()
+                data = dd.load_data.__wrapped__(version)
+                player = next(iter(data["rosters"].values()))[0]
+                dd.player_bounds.__wrapped__(player, version)
+                dd.player_stats.__wrapped__(player, version)
+                return len(dd.load_player_matches.__wrapped__(player, version))
+            finally:
+                os.chdir(cwd)
+
+        _, t_parquet, m_parquet = measure(lambda: load_page("dash_parquet"))
+        _, t_json, m_json = measure(lambda: load_page("dash_json"))
+        results[str(size)] = {
+            "parquet_s": round(t_parquet, 3), "parquet_rss_increase_mb": round(m_parquet, 1),
+            "json_s": round(t_json, 3), "json_rss_increase_mb": round(m_json, 1),
+            "parquet_mb": round(os.path.getsize(os.path.join("dash_parquet", dd.DATA_FILE)) / 1024 / 1024, 2),
+            "json_mb": round(os.path.getsize(os.path.join("dash_json", dd.LEGACY_DATA_FILE)) / 1024 / 1024, 2),
+        }
+        print(f"   📊 {size} matchs : Parquet {t_parquet:.3f}s / JSON {t_json:.3f}s")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Bench hors ligne contre le mock Riot")
+    parser.add_argument("--players", type=int, default=5, help="Taille du roster généré")
+    parser.add_argument("--matches", type=int, default=300, help="Matchs par joueur")
+    parser.add_argument("--ladder-size", type=int, default=300, help="Joueurs par (plateforme, tier)")
+    parser.add_argument("--ladder-top", type=int, default=0, help="Top N du scan ladder (0 = tout)")
+    parser.add_argument("--fixtures", help="Dossier de fixtures enregistrées (fixtures.json.gz)")
+    parser.add_argument("--from-store", help="Rejoue l'archive d'une base esport_data.db")
+    parser.add_argument("--app-limit", default="500:10,30000:600")
+    parser.add_argument("--method-limit", default="2000:10")
+    parser.add_argument("--latency", type=float, default=20, help="Latence ajoutée (ms)")
+    parser.add_argument("--jitter", type=float, default=5, help="Variation de latence (± ms)")
+    parser.add_argument("--inject-429", type=float, default=0.0, help="Probabilité d'un 429 injecté")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Tailles pour le bench du dashboard")
+    parser.add_argument("--skip", default="", help="Benchs à sauter : fetch_data,ladder,dashboard")
+    args = parser.parse_args()
+    skip = set(filter(None, args.skip.split(",")))
+
+    if args.fixtures:
+        fixtures = FixtureSet.load(args.fixtures)
+    elif args.from_store:
+        fixtures = FixtureSet.from_store(os.path.abspath(args.from_store))
+    else:
+        fixtures = FixtureSet.generate(args.players, args.matches, ladder_size=args.ladder_size)
+
+    results = {"config": vars(args)}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        fixtures_dir = os.path.join(workdir, "fixtures")
+        fixtures.save(fixtures_dir)
+        # Le mock relit les fixtures dans son process : on ne garde que le roster ici,
+        # pour que la mémoire mesurée soit celle des fetchers
+        roster, n_matches = fixtures.roster(args.players), len(fixtures.matches)
+        del fixtures
+        gc.collect()
+        server = MockProcess(fixtures_dir, args)
+        # Doit être posé avant le premier get_client()
+        os.environ["RIOT_API_BASE_URL"] = server.base_url
+        print(f"🧪 Mock Riot sur {server.base_url} ({n_matches} matchs)\n")
+
+        # Les fetchers écrivent leurs fichiers dans le dossier courant
+        os.chdir(workdir)
+        try:
+            if "fetch_data" not in skip:
+                print("⏱️ Fetch_data...")
+                results["fetch_data"] = bench_fetch_data(server, roster)
+            if "ladder" not in skip:
+                print("⏱️ Fetch_LeaderBoard...")
+                results["fetch_leaderboard"] = bench_fetch_leaderboard(server, args.ladder_top or None)
+            if "dashboard" not in skip:
+                print("⏱️ Chargement dashboard...")
+                results["dashboard_load"] = bench_dashboard_load([int(s) for s in args.sizes.split(",")])
+        finally:
+            os.chdir(cwd)
+            server.stop()
+
+    print("\n📋 RÉSULTATS")
+    print(json.dumps({k: v for k, v in results.items() if k != "config"}, indent=4))
+    with open(RESULTS_FILE, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(f"\n💾 Résultats dans '{RESULTS_FILE}'")
+
+    # Code retour non nul si un fetcher a dépassé les limites annoncées
+    violations = sum(results.get(k, {}).get("limit_violations", 0) for k in ("fetch_data", "fetch_leaderboard"))
+    sys.exit(1 if violations else 0)
+
+if __name__ == "__main__":
+    main()
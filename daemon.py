@@ -0,0 +1,226 @@
+import argparse
+import heapq
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import Fetch_data
+import Fetch_LeaderBoard
+from live_poller import LivePoller
+from match_store import MatchStore
+from riot_client import get_client
+from rosters import full_name, load_rosters, work_queue
+
+MATCH_REFRESH_INTERVAL = 15 * 60 # Refresh incrémental de chaque joueur
+LADDER_INTERVAL = 60 * 60
+LIVE_INTERVAL = 60
+EXPORT_INTERVAL = 60 # Ré-export du Parquet, seulement si de nouveaux matchs sont arrivés
+JOB_WORKERS = 4 # Jobs longs (matchs, ladder) exécutés en même temps (les requêtes partagent de toute façon le même budget)
+QUICK_WORKERS = 2 # Jobs courts (live, export, status) : leur propre pool, jamais bloqués derrière les jobs longs
+STATUS_FILE = "daemon_status.json"
+STATUS_PORT = 8765 # http://localhost:8765/status
+
+class Job:
+    """Tâche périodique : une fonction, un intervalle et ses derniers résultats (quick : job court)"""
+    def __init__(self, name, interval, func, quick=False):
+        self.name = name
+        self.interval = interval
+        self.func = func
+        self.quick = quick
+        self.next_run = time.time()
+        self.running = False
+        self.runs = 0
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+
+    def status(self):
+        return {
+            "interval": self.interval,
+            "running": self.running,
+            "runs": self.runs,
+            "last_run": datetime.fromtimestamp(self.last_run).strftime("%Y-%m-%d %H:%M:%S") if self.last_run else None,
+            "last_duration": round(self.last_duration, 2) if self.last_duration is not None else None,
+            "last_error": self.last_error,
+            "next_run_in": max(round(self.next_run - time.time()), 0),
+        }
+
+class Scheduler:
+    """
+    Boucle de planification : chaque job est relancé `interval` secondes après sa fin.
+    Un job en cours n'est jamais relancé en parallèle de lui-même. Les jobs courts ont leur
+    propre pool : le live et le statut tournent à l'heure même si tous les workers longs sont pris.
+    """
+    def __init__(self, workers=JOB_WORKERS, quick_workers=QUICK_WORKERS):
+        self.lock = threading.Lock()
+        self.jobs = {}
+        self.heap = [] # (next_run, name)
+        self.queued = 0 # Jobs dus mais en attente d'un worker
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self.quick_executor = ThreadPoolExecutor(max_workers=quick_workers, thread_name_prefix="quick-job")
+        self.wake = threading.Event()
+
+    def add(self, job):
+        with self.lock:
+            self.jobs[job.name] = job
+            heapq.heappush(self.heap, (job.next_run, job.name))
+        self.wake.set()
+
+    def _run_job(self, job):
+        with self.lock:
+            self.queued -= 1
+            job.running = True
+        start = time.time()
+        try:
+            job.func()
+            job.last_error = None
+        except Exception as e: # Un job qui plante ne doit pas arrêter le daemon
+            job.last_error = str(e)
+            print(f"   ❌ Job {job.name} : {e}")
+        finally:
+            with self.lock:
+                job.running = False
+                job.runs += 1
+                job.last_run = start
+                job.last_duration = time.time() - start
+                job.next_run = time.time() + job.interval
+                heapq.heappush(self.heap, (job.next_run, job.name))
+            self.wake.set()
+
+    def run_forever(self):
+        while True:
+            with self.lock:
+                now = time.time()
+                while self.heap and self.heap[0][0] <= now:
+                    _, name = heapq.heappop(self.heap)
+                    self.queued += 1
+                    job = self.jobs[name]
+                    (self.quick_executor if job.quick else self.executor).submit(self._run_job, job)
+                timeout = self.heap[0][0] - now if self.heap else None
+            self.wake.wait(timeout)
+            self.wake.clear()
+
+    def status(self):
+        with self.lock:
+            jobs = {name: job.status() for name, job in self.jobs.items()}
+            queued = self.queued
+        return {
+            "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "queue_depth": {"jobs": queued, **get_client().stats()},
+            "jobs": jobs,
+        }
+
+class RefreshDaemon:
+    """Service résident : matchs par joueur, ladder, live games, sur un seul client HTTP partagé"""
+    def __init__(self):
+        self.store = MatchStore()
+        self.scheduler = Scheduler()
+        self.players = {} # puuid -> "Nom#Tag"
+        self.dirty = threading.Event() # Nouveaux matchs en base, export à refaire
+        self.live = LivePoller(LIVE_INTERVAL)
+
+    def setup(self):
+        # Tous les rosters de rosters.json, par ordre de priorité (les premiers rafraîchis d'abord)
+        for roster in work_queue(load_rosters(default_players=Fetch_data.TEAM_PLAYERS)):
+            for p in roster["players"]:
+                name = full_name(p)
+                puuid = self.store.find_puuid(name) or Fetch_data.get_puuid(p['gameName'], p['tagLine'])
+                if not puuid:
+                    print(f"   ❌ {name} introuvable, ignoré")
+                    continue
+                self.store.save_player(puuid, name, roster["name"], roster["priority"])
+                self.players[puuid] = name
+
+        # Les joueurs sont décalés dans le temps pour lisser la charge
+        stagger = MATCH_REFRESH_INTERVAL / max(len(self.players), 1)
+        for i, (puuid, name) in enumerate(self.players.items()):
+            job = Job(f"matches:{name}", MATCH_REFRESH_INTERVAL, lambda puuid=puuid: self.refresh_player(puuid))
+            job.next_run = time.time() + i * stagger
+            self.scheduler.add(job)
+
+        self.live.set_players(self.players.values())
+        self.scheduler.add(Job("ladder", LADDER_INTERVAL, Fetch_LeaderBoard.refresh_ladder))
+        self.scheduler.add(Job("live", LIVE_INTERVAL, self.poll_live, quick=True))
+        self.scheduler.add(Job("export", EXPORT_INTERVAL, self.export_if_dirty, quick=True))
+        self.scheduler.add(Job("status", 10, self.write_status, quick=True))
+
+    def refresh_player(self, puuid):
+        wanted = {puuid: Fetch_data.discover_player_matches(self.store, puuid)}
+        # Tout le roster est "suivi" : un match joué ensemble remplit aussi les coéquipiers
+        if Fetch_data.process_roster_matches(self.store, self.players, wanted):
+            self.dirty.set()
+
+    def export_if_dirty(self):
+        if not self.dirty.is_set(): return
+        self.dirty.clear()
+        exported = [(name, puuid) for puuid, name in self.players.items() if self.store.latest_game_date(puuid)]
+        Fetch_data.export_data(self.store, exported)
+
+    def poll_live(self):
+        self.live.poll_once()
+        statuses = {name: self.live.get_status(name) for name in self.players.values()}
+        write_json_atomic("live_status.json", statuses)
+
+    def status(self):
+        return self.scheduler.status()
+
+    def write_status(self):
+        write_json_atomic(STATUS_FILE, self.status())
+        get_client().metrics.export("daemon")
+
+def write_json_atomic(path, data):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+def serve_status(daemon, port):
+    """GET /status : état des jobs et profondeur de file, en JSON. GET /metrics : format Prometheus"""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.rstrip("/")
+            if path == "/metrics":
+                body = get_client().metrics.to_prometheus().encode("utf-8")
+                content_type = "text/plain; version=0.0.4; charset=utf-8"
+            elif path in ("", "/status"):
+                body = json.dumps(daemon.status(), indent=4).encode("utf-8")
+                content_type = "application/json"
+            else:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args): # Pas de log HTTP dans la console
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name="status-http").start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Daemon de rafraîchissement des données")
+    parser.add_argument("--port", type=int, default=STATUS_PORT, help="Port du endpoint /status (0 = désactivé)")
+    args = parser.parse_args()
+
+    print("🚀 DÉMARRAGE DU DAEMON DE REFRESH\n")
+    daemon = RefreshDaemon()
+    daemon.setup()
+    if args.port:
+        serve_status(daemon, args.port)
+        print(f"   📡 Statut : http://localhost:{args.port}/status")
+    print(f"   ⏱️ {len(daemon.scheduler.jobs)} jobs planifiés\n")
+    try:
+        daemon.scheduler.run_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Arrêt du daemon.")
+
+if __name__ == "__main__":
+    main()
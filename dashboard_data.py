@@ -0,0 +1,210 @@
+"""
+Chargement des données du dashboard (app.py) : fichiers publiés par les fetchers,
+lus en ne gardant que les lignes / colonnes demandées, avec cache Streamlit par version
+de fichier. Séparé de app.py pour que bench/run_bench.py mesure ces fonctions-là.
+"""
+import json
+import os
+from datetime import datetime, time, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_files import column_names, distinct_rows, distinct_values, parquet_available, read_frame, read_metadata
+from ladder_history import HISTORY_PATH, LadderHistory
+from player_series import SERIES_COLUMNS, SERIES_PATH, PlayerSeries
+from rosters import DEFAULT_ROSTER
+
+DATA_FILE = "esport_data.parquet"
+LEGACY_DATA_FILE = "esport_data.json" # Ancien format, encore lu si pas de Parquet
+LADDER_FILE = "leaderboard_data.parquet"
+LEGACY_LADDER_FILE = "leaderboard_data.json"
+MAX_PLOT_POINTS = 1500 # Au-delà, les courbes et nuages de points sont sous-échantillonnés
+PERIOD_ROUNDING_MS = 3600 * 1000 # Début des périodes du ladder arrondi à l'heure
+
+# Colonnes réellement utilisées par la page "Analyse Joueur"
+PLAYER_COLUMNS = (
+    "match_id", "game_date", "queue_id", "win", "champion", "kills", "deaths", "assists",
+    "kda", "dpm", "gpm", "cs_min", "vision_score",
+    "gold_diff_10", "xp_diff_10", "cs_diff_10", "gold_diff_15", "xp_diff_15", "cs_diff_15", "first_blood_sec",
+    "opponent_champion", "dpm_diff", "gpm_diff", "cs_min_diff", "vision_diff"
+)
+
+def use_parquet(path):
+    return parquet_available() and os.path.exists(path)
+
+def file_version(path):
+    """(mtime, taille) du fichier : change dès qu'un fetcher le réécrit"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        return None
+
+def data_version():
+    """Clé de cache des données joueurs (passée en argument aux fonctions @st.cache_data)"""
+    return file_version(DATA_FILE if use_parquet(DATA_FILE) else LEGACY_DATA_FILE)
+
+def series_version():
+    """Clé de cache de player_series.db : en WAL, chaque commit touche le fichier -wal avant la base"""
+    return file_version(SERIES_PATH), file_version(SERIES_PATH + "-wal")
+
+def ladder_version():
+    return file_version(LADDER_FILE if use_parquet(LADDER_FILE) else LEGACY_LADDER_FILE)
+
+@st.cache_data
+def load_data(version):
+    """Date de MàJ + joueurs par roster ({roster: [joueurs]}), sans charger les matchs"""
+    if use_parquet(DATA_FILE):
+        rosters = {}
+        if "roster" in column_names(DATA_FILE):
+            for roster, player in distinct_rows(DATA_FILE, ["roster", "player"]):
+                rosters.setdefault(roster, []).append(player)
+        else: # Export d'avant les rosters
+            rosters[DEFAULT_ROSTER] = distinct_values(DATA_FILE, "player")
+        return {"last_update": read_metadata(DATA_FILE).get("last_update", "?"), "rosters": rosters}
+    try:
+        with open(LEGACY_DATA_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rosters = data.get("rosters") or {DEFAULT_ROSTER: list(data["players"].keys())}
+        return {"last_update": data.get("last_update", "?"), "rosters": rosters}
+    except FileNotFoundError:
+        return None
+
+@st.cache_data
+def load_player_matches(player, version, start_ms=None, end_ms=None, queues=None, columns=PLAYER_COLUMNS):
+    """
+    Matchs d'un seul joueur, en lisant uniquement ses lignes et les colonnes utiles.
+    Période [start_ms, end_ms[ et files (queue_id) filtrées à la lecture du Parquet :
+    les row groups hors période ne sont même pas décompressés.
+    """
+    if use_parquet(DATA_FILE):
+        available = set(column_names(DATA_FILE)) # Export d'avant les timelines : colonnes absentes
+        filters = [("player", "==", player)]
+        if start_ms is not None: filters.append(("game_date", ">=", start_ms))
+        if end_ms is not None: filters.append(("game_date", "<", end_ms))
+        if queues is not None and "queue_id" in available: filters.append(("queue_id", "in", list(queues)))
+        df = read_frame(DATA_FILE, columns=[c for c in columns if c in available], filters=filters)
+    else:
+        with open(LEGACY_DATA_FILE, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        df = pd.DataFrame(data["players"][player])
+        if not df.empty:
+            keep = pd.Series(True, index=df.index)
+            if start_ms is not None: keep &= df["game_date"] >= start_ms
+            if end_ms is not None: keep &= df["game_date"] < end_ms
+            if queues is not None and "queue_id" in df.columns: keep &= df["queue_id"].isin(queues)
+            df = df[keep].reset_index(drop=True)
+    if not df.empty:
+        df['date'] = pd.to_datetime(df['game_date'], unit='ms')
+    return df
+
+@st.cache_data
+def player_bounds(player, version):
+    """(premier jour, dernier jour, files jouées) du joueur, en lisant seulement game_date / queue_id"""
+    df = load_player_matches(player, version, columns=("game_date", "queue_id"))
+    if df.empty: return None
+    queues = sorted(int(q) for q in df["queue_id"].dropna().unique()) if "queue_id" in df.columns else []
+    return df["date"].min().date(), df["date"].max().date(), queues
+
+@st.cache_data
+def player_stats(player, version, start_ms=None, end_ms=None, queues=None):
+    """KPIs + stats par champion, calculés une fois par joueur, filtres et version du fichier"""
+    df = load_player_matches(player, version, start_ms, end_ms, queues)
+    total_games = len(df)
+    wins = int(df['win'].sum())
+    champ_stats = df.groupby("champion").agg(
+        Games=('match_id', 'count'),
+        Wins=('win', 'sum'),
+        Avg_DPM=('dpm', 'mean')
+    ).reset_index()
+    champ_stats['Winrate'] = (champ_stats['Wins'] / champ_stats['Games']) * 100
+    champ_stats = champ_stats.sort_values(by="Games", ascending=False)
+    return {
+        "total_games": total_games,
+        "wins": wins,
+        "winrate": (wins / total_games) * 100 if total_games else 0,
+        "avg_kda": df['kda'].mean(),
+        "avg_dpm": df['dpm'].mean(),
+        "avg_cs": df['cs_min'].mean(),
+        "champ_stats": champ_stats,
+    }
+
+@st.cache_data
+def load_ladder(version):
+    """Date de MàJ + liste des régions du ladder"""
+    if use_parquet(LADDER_FILE):
+        return {
+            "last_update": read_metadata(LADDER_FILE).get("last_update", "?"),
+            "regions": distinct_values(LADDER_FILE, "region")
+        }
+    try:
+        with open(LEGACY_LADDER_FILE, "r") as f:
+            data = json.load(f)
+        return {"last_update": data.get("last_update", "?"), "regions": list(data["regions"].keys())}
+    except FileNotFoundError:
+        return None
+
+@st.cache_data
+def load_ladder_region(region, version):
+    if use_parquet(LADDER_FILE):
+        return read_frame(LADDER_FILE, filters=[("region", "==", region)])
+    with open(LEGACY_LADDER_FILE, "r") as f:
+        data = json.load(f)
+    return pd.DataFrame(data["regions"].get(region, []))
+
+def downsample(df, max_points=MAX_PLOT_POINTS):
+    """Au plus max_points lignes, réparties régulièrement (la première et la dernière sont gardées)"""
+    if len(df) <= max_points: return df
+    return df.iloc[np.linspace(0, len(df) - 1, max_points).round().astype(int)]
+
+def day_ms(day):
+    """Date -> timestamp ms de minuit (heure locale)"""
+    return int(datetime.combine(day, time.min).timestamp() * 1000)
+
+def period_start(days):
+    """
+    Début de la période en ms (0 = depuis le premier scan), arrondi à PERIOD_ROUNDING_MS :
+    calculé par l'appelant et passé aux fonctions en cache, la fenêtre glisse sans
+    invalider le cache à chaque rerun.
+    """
+    if not days: return 0
+    start = int((datetime.now() - timedelta(days=days)).timestamp() * 1000)
+    return start - start % PERIOD_ROUNDING_MS
+
+@st.cache_data
+def load_lp_history(puuids, start_ts, version):
+    """Trajectoire LP des joueurs demandés : seulement leurs lignes, sur la période"""
+    history = LadderHistory(HISTORY_PATH)
+    try:
+        rows = history.trajectory(list(puuids), start_ts)
+    finally:
+        history.close()
+    df = pd.DataFrame(rows, columns=["puuid", "name", "ts", "rank", "lp", "wins", "losses", "tier"])
+    df["date"] = pd.to_datetime(df["ts"], unit="ms")
+    return df
+
+@st.cache_data
+def load_movers(region, start_ts, version):
+    """Progression de chaque joueur de la région sur la période (LP gagnés/perdus)"""
+    history = LadderHistory(HISTORY_PATH)
+    try:
+        rows = history.movers(region, start_ts)
+        scans = history.scans(region)
+    finally:
+        history.close()
+    df = pd.DataFrame(rows, columns=["puuid", "name", "lp_start", "lp_end", "lp_diff", "rank_start", "rank_end", "games"])
+    return df, scans
+
+@st.cache_data
+def load_form(players, version):
+    """Séries de forme des joueurs (une ligne par partie) et leur dernière ligne, lues telles quelles"""
+    series = PlayerSeries(SERIES_PATH)
+    try:
+        rows, latest = series.series(list(players)), series.latest(list(players))
+    finally:
+        series.close()
+    df = pd.DataFrame(rows, columns=SERIES_COLUMNS)
+    df["date"] = pd.to_datetime(df["game_date"], unit="ms")
+    return df, pd.DataFrame(latest, columns=SERIES_COLUMNS)
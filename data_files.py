@@ -0,0 +1,133 @@
+import json
+import os
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # pyarrow est optionnel : sans lui on reste sur les JSON
+    pa = pq = None
+
+# Colonnes des fichiers Parquet (nom -> type Arrow). Une colonne absente d'un match vaut null.
+MATCH_SCHEMA = {
+    "player": "string",
+    "roster": "string",
+    "match_id": "string",
+    "game_date": "int64",
+    "duration_sec": "int64",
+    "queue_id": "int64", # 420 SoloQ, 440 Flex... (null dans les lignes extraites avant son ajout)
+    "win": "bool",
+    "champion": "string",
+    "role": "string",
+    "kills": "int64",
+    "deaths": "int64",
+    "assists": "int64",
+    "kda": "float64",
+    "damage_total": "int64",
+    "dpm": "float64",
+    "gold_total": "int64",
+    "gpm": "float64",
+    "cs_total": "int64",
+    "cs_min": "float64",
+    "vision_score": "int64",
+    "wards_placed": "int64",
+    "wards_killed": "int64",
+    # Timeline (null si indisponible ou partie finie avant 10/15 min)
+    "gold_diff_10": "int64",
+    "xp_diff_10": "int64",
+    "cs_diff_10": "int64",
+    "gold_diff_15": "int64",
+    "xp_diff_15": "int64",
+    "cs_diff_15": "int64",
+    "first_blood_sec": "float64",
+    # Face à face avec l'adversaire de lane (même teamPosition)
+    "opponent_champion": "string",
+    "dpm_diff": "float64",
+    "gpm_diff": "float64",
+    "cs_min_diff": "float64",
+    "vision_diff": "int64",
+}
+
+LADDER_SCHEMA = {
+    "region": "string",
+    "rank": "int64",
+    "name": "string",
+    "puuid": "string",
+    "lp": "int64",
+    "winrate": "float64",
+    "wins": "int64",
+    "losses": "int64",
+    "tier": "string",
+}
+
+def parquet_available():
+    return pq is not None
+
+def _arrow_schema(schema, metadata=None):
+    fields = [pa.field(name, pa.type_for_alias(type_name)) for name, type_name in schema.items()]
+    return pa.schema(fields, metadata={k: str(v) for k, v in (metadata or {}).items()})
+
+class ParquetAppender:
+    """
+    Écrit un fichier Parquet par morceaux (un row group par appel à write),
+    sans jamais garder tout le jeu de données en mémoire.
+    Le fichier final n'apparaît qu'au close() (écriture dans un .tmp puis rename).
+    """
+    def __init__(self, path, schema, metadata=None):
+        self.path = path
+        self.tmp_path = path + ".tmp"
+        self.schema = _arrow_schema(schema, metadata)
+        self.writer = pq.ParquetWriter(self.tmp_path, self.schema, compression="zstd")
+
+    def write(self, rows):
+        if not rows: return
+        table = pa.Table.from_pylist(rows, schema=self.schema)
+        self.writer.write_table(table)
+
+    def close(self):
+        self.writer.close()
+        os.replace(self.tmp_path, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else: # On garde l'ancien fichier intact si l'écriture a planté
+            self.writer.close()
+            os.remove(self.tmp_path)
+
+def read_frame(path, columns=None, filters=None):
+    """
+    Lit directement un DataFrame depuis le Parquet.
+    columns : seulement ces colonnes ; filters : ex. [("player", "==", "Nom#Tag")]
+    (les row groups qui ne matchent pas ne sont même pas décompressés).
+    """
+    table = pq.read_table(path, columns=columns, filters=filters)
+    return table.to_pandas()
+
+def column_names(path):
+    """Colonnes présentes dans le fichier (un export ancien peut ne pas avoir les dernières)"""
+    return pq.read_schema(path).names
+
+def read_metadata(path):
+    """Métadonnées clé/valeur (ex: last_update) sans lire les données"""
+    metadata = pq.read_schema(path).metadata or {}
+    return {k.decode(): v.decode() for k, v in metadata.items()}
+
+def distinct_values(path, column):
+    """Valeurs distinctes d'une colonne, dans l'ordre d'apparition"""
+    values = pq.read_table(path, columns=[column]).column(column).to_pylist()
+    return list(dict.fromkeys(values))
+
+def distinct_rows(path, columns):
+    """Combinaisons distinctes de plusieurs colonnes (tuples), dans l'ordre d'apparition"""
+    table = pq.read_table(path, columns=columns)
+    return list(dict.fromkeys(zip(*(table.column(c).to_pylist() for c in columns))))
+
+def write_json(path, data):
+    """Export JSON historique (indent=4), écrit de façon atomique"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
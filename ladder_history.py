@@ -0,0 +1,173 @@
+"""
+Historique du ladder : une série temporelle par joueur (PUUID), en ajout seul.
+
+À chaque scan, on n'écrit que les joueurs dont le rang, les LP, les victoires,
+les défaites ou le tier ont changé depuis le scan précédent. Une ligne vaut
+"état du joueur à partir de ts", jusqu'à sa ligne suivante. Un joueur sorti de
+la partie scannée du classement reçoit une ligne vide (rank NULL).
+"""
+import sqlite3
+import threading
+import time
+
+HISTORY_PATH = "ladder_history.db"
+STATE_FIELDS = ("rank", "lp", "wins", "losses", "tier")
+
+class LadderHistory:
+    """Stockage SQLite de l'historique, lu par app.py (trajectoires, progressions)"""
+    def __init__(self, path=HISTORY_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            -- Un id entier par PUUID (l'historique ne répète pas les PUUID) + dernier état connu,
+            -- pour comparer un scan sans relire l'historique
+            CREATE TABLE IF NOT EXISTS ladder_players (
+                id     INTEGER PRIMARY KEY,
+                puuid  TEXT NOT NULL UNIQUE,
+                region TEXT NOT NULL,
+                name   TEXT,
+                rank   INTEGER,
+                lp     INTEGER,
+                wins   INTEGER,
+                losses INTEGER,
+                tier   TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_ladder_players_region ON ladder_players (region);
+
+            -- Changements seulement, rangés par joueur puis date (WITHOUT ROWID : la table est l'index)
+            CREATE TABLE IF NOT EXISTS ladder_history (
+                player_id INTEGER NOT NULL,
+                ts        INTEGER NOT NULL,
+                rank      INTEGER,
+                lp        INTEGER,
+                wins      INTEGER,
+                losses    INTEGER,
+                tier      TEXT,
+                PRIMARY KEY (player_id, ts)
+            ) WITHOUT ROWID;
+
+            -- Un scan par région : taille couverte et nombre de lignes écrites
+            CREATE TABLE IF NOT EXISTS ladder_scans (
+                region  TEXT NOT NULL,
+                ts      INTEGER NOT NULL,
+                size    INTEGER NOT NULL,
+                changed INTEGER NOT NULL,
+                PRIMARY KEY (region, ts)
+            );
+        """)
+        self.conn.commit()
+
+    def append_snapshot(self, region, entries, ts=None):
+        """
+        entries : lignes du scan d'une région (build_entry de Fetch_LeaderBoard).
+        Écrit les changements dans un seul commit, renvoie le nombre de lignes ajoutées.
+        """
+        ts = ts or int(time.time() * 1000)
+        with self.lock:
+            known = {
+                row[1]: row for row in self.conn.execute(
+                    "SELECT id, puuid, name, rank, lp, wins, losses, tier FROM ladder_players WHERE region = ?", (region,)
+                )
+            }
+            changes, renamed, seen = [], [], set()
+            for e in entries:
+                puuid = e.get("puuid")
+                if not puuid: continue # Entrée sans PUUID (ancienne API) : pas de série possible
+                seen.add(puuid)
+                state = tuple(e[f] for f in STATE_FIELDS)
+                old = known.get(puuid)
+                if old is None:
+                    player_id = self.conn.execute(
+                        "INSERT INTO ladder_players (puuid, region, name) VALUES (?, ?, ?)", (puuid, region, e["name"])
+                    ).lastrowid
+                else:
+                    player_id = old[0]
+                    if old[2] != e["name"]: renamed.append((e["name"], player_id))
+                    if old[3:] == state: continue
+                changes.append((player_id, ts, *state))
+
+            # Absent alors que le scan couvrait son ancien rang : il est vraiment sorti
+            # (un scan plus court, ex. --top 100 après --full, ne fait sortir personne)
+            for puuid, old in known.items():
+                if puuid not in seen and old[3] is not None and old[3] <= len(entries):
+                    changes.append((old[0], ts) + (None,) * len(STATE_FIELDS))
+
+            self.conn.executemany("INSERT OR REPLACE INTO ladder_history VALUES (?, ?, ?, ?, ?, ?, ?)", changes)
+            self.conn.executemany(
+                "UPDATE ladder_players SET rank = ?, lp = ?, wins = ?, losses = ?, tier = ? WHERE id = ?",
+                [(*row[2:], row[0]) for row in changes]
+            )
+            self.conn.executemany("UPDATE ladder_players SET name = ? WHERE id = ?", renamed)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO ladder_scans (region, ts, size, changed) VALUES (?, ?, ?, ?)",
+                (region, ts, len(entries), len(changes))
+            )
+            self.conn.commit()
+        return len(changes)
+
+    def scans(self, region):
+        """(premier scan, dernier scan, nombre de scans) de la région, en ms"""
+        with self.lock:
+            return self.conn.execute(
+                "SELECT MIN(ts), MAX(ts), COUNT(*) FROM ladder_scans WHERE region = ?", (region,)
+            ).fetchone()
+
+    def trajectory(self, puuids, start_ts=None, end_ts=None):
+        """
+        Séries des joueurs demandés sur [start_ts, end_ts] : [(puuid, name, ts, rank, lp, wins, losses, tier)].
+        Commence par l'état en vigueur à start_ts et se termine par un point à end_ts,
+        pour tracer la courbe en escalier sur toute la période.
+        """
+        start_ts = start_ts or 0
+        end_ts = end_ts or int(time.time() * 1000)
+        marks = ",".join("?" * len(puuids))
+        with self.lock:
+            rows = self.conn.execute(f"""
+                SELECT p.puuid, p.name, h.ts, h.rank, h.lp, h.wins, h.losses, h.tier
+                FROM ladder_players p JOIN ladder_history h ON h.player_id = p.id
+                WHERE p.puuid IN ({marks}) AND h.ts <= ?
+                  AND h.ts >= COALESCE(
+                      (SELECT MAX(ts) FROM ladder_history WHERE player_id = p.id AND ts <= ?), ?)
+                ORDER BY p.puuid, h.ts
+            """, (*puuids, end_ts, start_ts, start_ts)).fetchall()
+
+        series = []
+        for i, row in enumerate(rows):
+            series.append((row[0], row[1], max(row[2], start_ts)) + row[3:])
+            last = i + 1 == len(rows) or rows[i + 1][0] != row[0]
+            if last and row[4] is not None: # Encore classé : l'état dure jusqu'à end_ts
+                series.append((row[0], row[1], end_ts) + row[3:])
+        return series
+
+    def movers(self, region, start_ts, end_ts=None):
+        """
+        Évolution de chaque joueur de la région entre start_ts et end_ts, triée par LP gagnés :
+        [(puuid, name, lp_début, lp_fin, écart_lp, rang_début, rang_fin, games)].
+        Un joueur entré dans le classement pendant la période part de sa première ligne.
+        Les joueurs hors classement à l'une des deux bornes sont ignorés.
+        """
+        end_ts = end_ts or int(time.time() * 1000)
+        with self.lock:
+            return self.conn.execute("""
+                WITH bounds AS (
+                    SELECT p.id, p.puuid, p.name,
+                        COALESCE(
+                            (SELECT MAX(ts) FROM ladder_history WHERE player_id = p.id AND ts <= :start),
+                            (SELECT MIN(ts) FROM ladder_history WHERE player_id = p.id AND ts > :start AND ts <= :end)
+                        ) AS t0,
+                        (SELECT MAX(ts) FROM ladder_history WHERE player_id = p.id AND ts <= :end) AS t1
+                    FROM ladder_players p WHERE p.region = :region
+                )
+                SELECT b.puuid, b.name, h0.lp, h1.lp, h1.lp - h0.lp, h0.rank, h1.rank,
+                       (h1.wins + h1.losses) - (h0.wins + h0.losses)
+                FROM bounds b
+                JOIN ladder_history h0 ON h0.player_id = b.id AND h0.ts = b.t0
+                JOIN ladder_history h1 ON h1.player_id = b.id AND h1.ts = b.t1
+                WHERE h0.lp IS NOT NULL AND h1.lp IS NOT NULL
+                ORDER BY h1.lp - h0.lp DESC
+            """, {"region": region, "start": start_ts, "end": end_ts}).fetchall()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from riot_client import get_client
+
+ACCOUNT_ROUTING = "europe"
+LIVE_PLATFORM = "euw1" # Plateforme interrogée par spectator-v5
+POLL_INTERVAL = 60 # Secondes entre deux tours de vérification
+STATUS_TTL = 3 * POLL_INTERVAL # Au-delà, un statut est considéré comme périmé
+PUUID_CACHE_FILE = "puuid_cache.json" # Riot ID -> PUUID (un PUUID ne change jamais)
+MAX_WORKERS = 10
+
+class LivePoller(threading.Thread):
+    """
+    Thread de fond qui vérifie spectator-v5 pour tout le roster toutes les POLL_INTERVAL secondes.
+    Le dashboard lit get_status() : pas d'appel réseau dans l'UI, et le nombre d'appels ne
+    dépend pas du nombre de personnes sur le dashboard. Seul le joueur affiché, s'il n'a jamais
+    été vérifié, passe devant (request_check, priorité "interactive", en fond lui aussi).
+    """
+    def __init__(self, interval=POLL_INTERVAL):
+        super().__init__(daemon=True, name="live-poller")
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.players = []
+        self.wake = threading.Event() # Réveille le thread quand le roster change
+        self.statuses = {} # "Nom#Tag" -> {"in_game", "mode", "checked_at", "error"}
+        self.requested = {} # "Nom#Tag" -> date de la dernière vérification demandée par l'UI
+        self.executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="live-check")
+        self.puuids = self.load_puuid_cache()
+
+    @staticmethod
+    def load_puuid_cache():
+        try:
+            with open(PUUID_CACHE_FILE, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_puuid_cache(self):
+        with self.lock:
+            data = dict(self.puuids)
+        tmp_path = PUUID_CACHE_FILE + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, PUUID_CACHE_FILE)
+
+    def set_players(self, players):
+        players = list(players)
+        with self.lock:
+            if players == self.players: return
+            self.players = players
+        self.wake.set()
+
+    def get_status(self, player):
+        """Dernier statut connu, ou None s'il n'a jamais été vérifié / est périmé"""
+        with self.lock:
+            status = self.statuses.get(player)
+        if status and time.time() - status["checked_at"] < STATUS_TTL:
+            return status
+        return None
+
+    def resolve_puuid(self, player, priority="live"):
+        with self.lock:
+            if player in self.puuids: return self.puuids[player]
+        game_name, tag_line = player.split("#")
+        url = f"https://{ACCOUNT_ROUTING}.api.riotgames.com/riot/account/v1/accounts/by-riot-id/{game_name}/{tag_line}"
+        data = get_client().get_json(url, method="account-v1:by-riot-id", priority=priority)
+        if not data: return None
+        with self.lock:
+            self.puuids[player] = data["puuid"]
+        return data["puuid"]
+
+    def check_player(self, player, priority="live"):
+        status = {"in_game": False, "mode": None, "checked_at": time.time(), "error": None}
+        puuid = self.resolve_puuid(player, priority)
+        if not puuid:
+            status["error"] = "Joueur introuvable"
+        else:
+            url = f"https://{LIVE_PLATFORM}.api.riotgames.com/lol/spectator/v5/active-games/by-summoner/{puuid}"
+            code, game_info = get_client().fetch(url, method="spectator-v5:active-games", priority=priority)
+            if code == 200:
+                status["in_game"] = True
+                status["mode"] = game_info.get("gameMode")
+            elif code != 404: # 404 = pas en partie
+                status["error"] = f"Erreur Spectator: {code}"
+        with self.lock:
+            self.statuses[player] = status
+
+    def request_check(self, player):
+        """
+        Joueur affiché jamais vérifié : vérification "interactive" lancée en fond, sans bloquer l'UI.
+        Une seule par joueur et par STATUS_TTL, toutes sessions confondues ; un joueur déjà vérifié
+        (même en erreur ou périmé) est laissé au polling.
+        """
+        now = time.time()
+        with self.lock:
+            if player in self.statuses or now - self.requested.get(player, 0) < STATUS_TTL: return
+            self.requested[player] = now
+        self.executor.submit(self.check_player, player, "interactive")
+
+    def poll_once(self):
+        with self.lock:
+            players = list(self.players)
+            known_puuids = len(self.puuids)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            list(executor.map(self.check_player, players))
+        if len(self.puuids) != known_puuids:
+            self.save_puuid_cache()
+
+    def run(self):
+        while True:
+            try:
+                self.poll_once()
+            except Exception as e: # Le thread ne doit jamais mourir en silence
+                print(f"   ❌ Live poller : {e}")
+            self.wake.wait(self.interval)
+            self.wake.clear()
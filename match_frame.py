@@ -0,0 +1,177 @@
+"""
+Extraction en lot : les 10 participants de N matchs dans un seul DataFrame.
+
+On ne fait en Python que la copie des champs bruts (une liste par participant) ;
+les taux (DPM, GPM, CS/min) et les écarts avec l'adversaire de lane (même
+teamPosition, équipe adverse) sont calculés en colonnes, pour tous les matchs d'un coup.
+"""
+import numpy as np
+import pandas as pd
+
+from match_timeline import TIMELINE_MINUTES
+
+REMAKE_MAX_SEC = 300 # En dessous : remake, pas de ligne ni de timeline
+
+# Colonne -> clé du participant match-v5
+PARTICIPANT_KEYS = {
+    "puuid": "puuid",
+    "team_id": "teamId",
+    "role": "teamPosition",
+    "win": "win",
+    "champion": "championName",
+    "kills": "kills",
+    "deaths": "deaths",
+    "assists": "assists",
+    "damage_total": "totalDamageDealtToChampions",
+    "gold_total": "goldEarned",
+    "minions": "totalMinionsKilled",
+    "neutral_minions": "neutralMinionsKilled",
+    "vision_score": "visionScore",
+    "wards_placed": "wardsPlaced",
+    "wards_killed": "wardsKilled",
+}
+COLUMN_DTYPES = {column: "int64" for column in PARTICIPANT_KEYS if column not in ("puuid", "role", "win", "champion")}
+COLUMN_DTYPES["win"] = "bool"
+TIMELINE_STATS = [f"{stat}_{minute}" for minute in TIMELINE_MINUTES for stat in ("gold", "xp", "cs")]
+
+# Stat du participant -> colonne "écart avec l'adversaire de lane"
+LANE_DIFFS = {
+    "dpm": "dpm_diff",
+    "gpm": "gpm_diff",
+    "cs_min": "cs_min_diff",
+    "vision_score": "vision_diff",
+    **{stat: stat.replace("_", "_diff_") for stat in TIMELINE_STATS}, # gold_10 -> gold_diff_10
+}
+
+# Une ligne de la base / du Parquet, dans cet ordre
+ENTRY_COLUMNS = (
+    "match_id", "game_date", "duration_sec", "queue_id", "win", "champion", "role",
+    "kills", "deaths", "assists", "kda",
+    "damage_total", "dpm", "gold_total", "gpm", "cs_total", "cs_min",
+    "vision_score", "wards_placed", "wards_killed",
+    "gold_diff_10", "xp_diff_10", "cs_diff_10", "gold_diff_15", "xp_diff_15", "cs_diff_15", "first_blood_sec",
+    "opponent_champion", "dpm_diff", "gpm_diff", "cs_min_diff", "vision_diff",
+)
+# Écarts entiers, null si pas d'adversaire / pas de timeline
+NULLABLE_INT_COLUMNS = [c for c in ENTRY_COLUMNS if c.startswith(("gold_diff", "xp_diff", "cs_diff", "vision_diff"))]
+
+def participants_frame(matches):
+    """
+    matches : itérable de (match_id, payload match-v5, résumé de timeline ou None).
+    Renvoie un DataFrame avec une ligne par participant (10 par match), remakes compris.
+    """
+    # Une liste par colonne, remplie par des compréhensions (pas de dict intermédiaire par ligne)
+    matches = list(matches)
+    infos = [data["info"] for _, data, _ in matches]
+    parts = [p for info in infos for p in info["participants"]]
+    sizes = [len(info["participants"]) for info in infos]
+
+    def per_match(values, dtype=None):
+        return np.repeat(np.array(values, dtype=dtype), sizes)
+
+    columns = {
+        "match_id": per_match([match_id for match_id, _, _ in matches], object),
+        "game_date": per_match([info["gameEndTimestamp"] for info in infos], "int64"),
+        "duration_sec": per_match([info["gameDuration"] for info in infos], "int64"),
+        "queue_id": per_match([info.get("queueId", 0) for info in infos], "int64"),
+        "participant_id": np.array([p.get("participantId", i + 1) for info in infos
+                                    for i, p in enumerate(info["participants"])], dtype="int64"),
+        "kda": np.array([p.get("challenges", {}).get("kda", 0) for p in parts], dtype="float64"),
+        "first_blood_ms": per_match([timeline["first_blood_ms"] if timeline else None
+                                     for _, _, timeline in matches], "float64"),
+    }
+    for column, key in PARTICIPANT_KEYS.items():
+        # dtype donné d'avance : pandas n'a pas à deviner le type valeur par valeur
+        columns[column] = np.array([p[key] for p in parts], dtype=COLUMN_DTYPES.get(column, object))
+
+    # Stats des frames 10/15 min, par participantId (NaN sans timeline ou partie trop courte)
+    frames = [timeline["frames"] if timeline else {} for _, _, timeline in matches]
+    for minute in TIMELINE_MINUTES:
+        stats = [frame.get(str(minute), {}) for frame in frames]
+        values = np.array([stat.get(str(pid)) or (np.nan,) * 3 for stat, n in zip(stats, sizes)
+                           for pid in range(1, n + 1)], dtype="float64").reshape(-1, 3)
+        for i, stat in enumerate(("gold", "xp", "cs")):
+            columns[f"{stat}_{minute}"] = values[:, i]
+
+    duration_min = columns["duration_sec"] / 60
+    columns["dpm"] = (columns["damage_total"] / duration_min).round(1)
+    columns["gpm"] = (columns["gold_total"] / duration_min).round(1)
+    columns["cs_total"] = columns["minions"] + columns["neutral_minions"]
+    columns["cs_min"] = (columns["cs_total"] / duration_min).round(1)
+    columns["first_blood_sec"] = (columns["first_blood_ms"] / 1000).round(1)
+    add_lane_diffs(columns, sizes)
+    return pd.DataFrame(columns)
+
+def add_lane_diffs(columns, sizes):
+    """
+    Ajoute opponent_champion et les colonnes de LANE_DIFFS (face à face sur le même teamPosition).
+    Chaque ligne reçoit une clé (match, poste, équipe) : l'adversaire est la ligne dont
+    seule l'équipe diffère, retrouvée par recherche dans les clés triées.
+    """
+    n = len(columns["role"])
+    role_codes = {"": 0}
+    roles = np.array([role_codes.setdefault(r, len(role_codes)) for r in columns["role"]], dtype="int64")
+    match_index = np.repeat(np.arange(len(sizes)), sizes)
+    keys = (match_index * len(role_codes) + roles) * 2 + (columns["team_id"] != 100)
+
+    # Un seul joueur par poste et par équipe (les customs peuvent en avoir deux) : le premier
+    uniq, first = np.unique(keys, return_index=True)
+    own = first[np.searchsorted(uniq, keys)] == np.arange(n)
+    opp_pos = np.minimum(np.searchsorted(uniq, keys ^ 1), len(uniq) - 1)
+    has_opp = own & (roles > 0) & (uniq[opp_pos] == (keys ^ 1)) if n else np.zeros(0, dtype=bool)
+    rows, opp = np.nonzero(has_opp)[0], first[opp_pos[has_opp]]
+
+    champions = np.full(n, None, dtype=object)
+    champions[rows] = columns["champion"][opp]
+    columns["opponent_champion"] = champions
+    for stat, column in LANE_DIFFS.items():
+        diff = np.full(n, np.nan)
+        diff[rows] = columns[stat][rows] - columns[stat][opp]
+        columns[column] = diff.round(1)
+
+def frame_entries(df):
+    """Lignes du DataFrame -> entrées de la base (dict), avec None à la place des NaN"""
+    values = []
+    for column in ENTRY_COLUMNS:
+        series = df[column]
+        if column in NULLABLE_INT_COLUMNS:
+            series = series.round().astype("Int64")
+        if series.hasnans:
+            series = series.astype(object).where(series.notna(), None)
+        values.append(series.tolist()) # tolist() rend des types Python natifs (JSON-sérialisables)
+    return [dict(zip(ENTRY_COLUMNS, row)) for row in zip(*values)]
+
+def frame_json(df):
+    """Comme frame_entries, mais directement en texte JSON (une chaîne par ligne, sérialisée en C)"""
+    if df.empty: return []
+    out = df.loc[:, list(ENTRY_COLUMNS)].copy()
+    for column in NULLABLE_INT_COLUMNS:
+        out[column] = out[column].round().astype("Int64")
+    return out.to_json(orient="records", lines=True).splitlines()
+
+def build_batch_entries(matches, puuids):
+    """
+    Lot de matchs -> {match_id: {puuid: entrée ou None (remake)}}, pour les puuids
+    suivis présents dans chaque match. matches : [(match_id, payload, timeline)].
+    """
+    df = participants_frame(matches)
+    df = df[df["puuid"].isin(puuids)]
+    entries = {match_id: {} for match_id, _, _ in matches}
+    remake = df["duration_sec"] < REMAKE_MAX_SEC
+    for match_id, puuid in zip(df.loc[remake, "match_id"], df.loc[remake, "puuid"]):
+        entries[match_id][puuid] = None
+    kept = df[~remake]
+    for puuid, entry in zip(kept["puuid"], frame_entries(kept)):
+        entries[entry["match_id"]][puuid] = entry
+    return entries
+
+def build_owner_rows(matches, owners):
+    """
+    Lot de matchs -> lignes prêtes pour MatchStore.save_match_rows, pour les (match_id, puuid) de owners.
+    matches : [(match_id, payload, timeline)] ; owners : [(match_id, puuid, player)].
+    """
+    df = participants_frame(matches)
+    df = df[df["duration_sec"] >= REMAKE_MAX_SEC]
+    df = df.merge(pd.DataFrame(owners, columns=["match_id", "puuid", "player"]), on=["match_id", "puuid"])
+    return list(zip(df["match_id"].tolist(), df["puuid"].tolist(), df["player"].tolist(),
+                    df["game_date"].tolist(), frame_json(df)))
@@ -0,0 +1,292 @@
+import sqlite3
+import json
+import gzip
+import threading
+
+try:
+    import zstandard # Optionnel : plus rapide et plus compact que gzip
+except ImportError:
+    zstandard = None
+
+STORE_PATH = "esport_data.db" # Base locale des matchs déjà récupérés
+BUSY_TIMEOUT = 30 # Secondes d'attente du verrou d'écriture (plusieurs process workers sur la même base)
+
+def compress_payload(data):
+    """Payload match-v5 (dict) -> (codec, blob compressé)"""
+    raw = json.dumps(data, separators=(",", ":")).encode("utf-8")
+    if zstandard:
+        return "zstd", zstandard.ZstdCompressor(level=10).compress(raw)
+    return "gzip", gzip.compress(raw, compresslevel=6)
+
+def decompress_payload(codec, blob):
+    if codec == "zstd":
+        return json.loads(zstandard.ZstdDecompressor().decompress(blob))
+    return json.loads(gzip.decompress(blob))
+
+class MatchStore:
+    """
+    Stockage SQLite des matchs extraits, une ligne par (match_id, puuid).
+    Sert de mémoire entre deux lancements de Fetch_data : on ne retélécharge
+    que ce qui n'est pas encore en base.
+    """
+    def __init__(self, path=STORE_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL") # Un commit par match reste rapide
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS matches (
+                match_id  TEXT NOT NULL,
+                puuid     TEXT NOT NULL,
+                player    TEXT NOT NULL,
+                game_date INTEGER NOT NULL,
+                data      TEXT NOT NULL,
+                PRIMARY KEY (match_id, puuid)
+            );
+            CREATE INDEX IF NOT EXISTS idx_matches_puuid_date ON matches (puuid, game_date);
+
+            -- Remakes & co : pas de ligne à garder, mais inutile de les redemander
+            CREATE TABLE IF NOT EXISTS ignored_matches (
+                match_id TEXT NOT NULL,
+                puuid    TEXT NOT NULL,
+                PRIMARY KEY (match_id, puuid)
+            );
+
+            -- Payload match-v5 complet, compressé : permet de recalculer sans l'API
+            CREATE TABLE IF NOT EXISTS raw_matches (
+                match_id TEXT PRIMARY KEY,
+                codec    TEXT NOT NULL,
+                payload  BLOB NOT NULL
+            );
+
+            -- Résumé de la timeline (frames 10/15 min, first blood), voir match_timeline.py
+            CREATE TABLE IF NOT EXISTS timelines (
+                match_id TEXT PRIMARY KEY,
+                data     TEXT NOT NULL
+            );
+
+            -- Joueurs suivis : roster d'appartenance et puuid déjà résolu (pas de requête account-v1 à chaque run)
+            CREATE TABLE IF NOT EXISTS players (
+                puuid    TEXT PRIMARY KEY,
+                player   TEXT NOT NULL,
+                roster   TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_players_player ON players (player);
+
+            -- Matchs réservés par un worker pendant un run multi-process : un seul le télécharge
+            CREATE TABLE IF NOT EXISTS match_claims (
+                run_id   TEXT NOT NULL,
+                match_id TEXT NOT NULL,
+                PRIMARY KEY (run_id, match_id)
+            );
+
+            -- Où en était le dernier run (joueurs finis, matchs restant à télécharger)
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                key   TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        self.conn.commit()
+
+    def latest_game_date(self, puuid):
+        """Timestamp (ms) du match le plus récent en base pour ce joueur, None si aucun"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT MAX(game_date) FROM matches WHERE puuid = ?", (puuid,)
+            ).fetchone()
+        return row[0]
+
+    def known_match_ids(self, puuid):
+        """Tous les match_id déjà traités (stockés ou ignorés) pour ce joueur"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT match_id FROM matches WHERE puuid = ? "
+                "UNION SELECT match_id FROM ignored_matches WHERE puuid = ?",
+                (puuid, puuid)
+            ).fetchall()
+        return {r[0] for r in rows}
+
+    def save_match(self, puuid, player, match):
+        """Écrit (et commit) un match tout de suite : rien n'est perdu si le script s'arrête"""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO matches (match_id, puuid, player, game_date, data) VALUES (?, ?, ?, ?, ?)",
+                (match["match_id"], puuid, player, match["game_date"], json.dumps(match))
+            )
+            self.conn.commit()
+
+    def save_matches(self, rows):
+        """rows : liste de (puuid, player, match), en un seul commit"""
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches (match_id, puuid, player, game_date, data) VALUES (?, ?, ?, ?, ?)",
+                [(m["match_id"], puuid, player, m["game_date"], json.dumps(m)) for puuid, player, m in rows]
+            )
+            self.conn.commit()
+
+    def save_match_rows(self, rows):
+        """rows : liste de (match_id, puuid, player, game_date, data déjà en JSON), en un seul commit"""
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO matches (match_id, puuid, player, game_date, data) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            self.conn.commit()
+
+    def save_raw(self, match_id, codec, blob):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR IGNORE INTO raw_matches (match_id, codec, payload) VALUES (?, ?, ?)",
+                (match_id, codec, blob)
+            )
+            self.conn.commit()
+
+    def get_raw(self, match_id):
+        """Payload d'un match depuis l'archive (None s'il n'y est pas)"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT codec, payload FROM raw_matches WHERE match_id = ?", (match_id,)
+            ).fetchone()
+        return decompress_payload(*row) if row else None
+
+    def save_timeline(self, match_id, summary):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO timelines (match_id, data) VALUES (?, ?)", (match_id, json.dumps(summary))
+            )
+            self.conn.commit()
+
+    def get_timeline(self, match_id):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM timelines WHERE match_id = ?", (match_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def missing_timelines(self):
+        """match_id en base (hors remakes) dont la timeline n'a pas encore été récupérée"""
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT DISTINCT m.match_id FROM matches m LEFT JOIN timelines t ON t.match_id = m.match_id "
+                "WHERE t.match_id IS NULL ORDER BY m.game_date DESC"
+            ).fetchall()
+        return [r[0] for r in rows]
+
+    def iter_raw_batches(self, batch_size=200):
+        """
+        Archive par paquets : [(match_id, codec, blob, timeline ou None, [(puuid, player), ...]), ...]
+        avec, pour chaque match, les joueurs suivis qui ont une ligne en base.
+        """
+        after = ""
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT r.match_id, r.codec, r.payload, t.data FROM raw_matches r "
+                    "LEFT JOIN timelines t ON t.match_id = r.match_id WHERE r.match_id > ? "
+                    "ORDER BY r.match_id LIMIT ?", (after, batch_size)
+                ).fetchall()
+                if not rows: return
+                owners = {}
+                for match_id, puuid, player in self.conn.execute(
+                    "SELECT match_id, puuid, player FROM matches WHERE match_id >= ? AND match_id <= ?",
+                    (rows[0][0], rows[-1][0])
+                ):
+                    owners.setdefault(match_id, []).append((puuid, player))
+            yield [(match_id, codec, blob, json.loads(timeline) if timeline else None, owners.get(match_id, []))
+                   for match_id, codec, blob, timeline in rows]
+            after = rows[-1][0]
+
+    def list_players(self):
+        """(player, puuid) de tous les joueurs présents en base"""
+        with self.lock:
+            return self.conn.execute("SELECT DISTINCT player, puuid FROM matches ORDER BY player").fetchall()
+
+    def save_player(self, puuid, player, roster, priority=0):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO players (puuid, player, roster, priority) VALUES (?, ?, ?, ?)",
+                (puuid, player, roster, priority)
+            )
+            self.conn.commit()
+
+    def find_puuid(self, player):
+        """puuid déjà résolu pour ce "Nom#Tag" (None s'il n'a jamais été vu)"""
+        with self.lock:
+            row = self.conn.execute("SELECT puuid FROM players WHERE player = ?", (player,)).fetchone()
+        return row[0] if row else None
+
+    def tracked_players(self):
+        """{puuid: "Nom#Tag"} de tous les rosters"""
+        with self.lock:
+            return dict(self.conn.execute("SELECT puuid, player FROM players").fetchall())
+
+    def player_rosters(self):
+        """{puuid: (roster, priorité)}"""
+        with self.lock:
+            rows = self.conn.execute("SELECT puuid, roster, priority FROM players").fetchall()
+        return {puuid: (roster, priority) for puuid, roster, priority in rows}
+
+    def mark_ignored(self, puuid, match_ids):
+        with self.lock:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO ignored_matches (match_id, puuid) VALUES (?, ?)",
+                [(match_id, puuid) for match_id in match_ids]
+            )
+            self.conn.commit()
+
+    def iter_player_batches(self, puuid, batch_size=1000):
+        """
+        Matchs du joueur par paquets, du plus récent au plus ancien (même ordre que l'API).
+        Pagination par game_date : la mémoire ne dépend pas de la taille de l'historique.
+        """
+        before = None
+        while True:
+            with self.lock:
+                rows = self.conn.execute(
+                    "SELECT game_date, data FROM matches WHERE puuid = ? AND (? IS NULL OR game_date < ?) "
+                    "ORDER BY game_date DESC LIMIT ?",
+                    (puuid, before, before, batch_size)
+                ).fetchall()
+            if not rows: return
+            yield [json.loads(r[1]) for r in rows]
+            before = rows[-1][0]
+
+    def iter_player_matches(self, puuid):
+        for batch in self.iter_player_batches(puuid):
+            yield from batch
+
+    def get_checkpoint(self, key):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM checkpoints WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_checkpoint(self, key, value):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (key, value) VALUES (?, ?)", (key, json.dumps(value))
+            )
+            self.conn.commit()
+
+    def clear_checkpoint(self, key):
+        with self.lock:
+            self.conn.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def claim_matches(self, run_id, match_ids):
+        """Réserve les matchs pour ce worker : renvoie ceux qu'aucun autre worker du run n'a déjà pris"""
+        claimed = []
+        with self.lock:
+            for match_id in match_ids:
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO match_claims (run_id, match_id) VALUES (?, ?)", (run_id, match_id)
+                )
+                if cursor.rowcount: claimed.append(match_id)
+            self.conn.commit()
+        return claimed
+
+    def clear_claims(self, run_id):
+        with self.lock:
+            self.conn.execute("DELETE FROM match_claims WHERE run_id = ?", (run_id,))
+            self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,76 @@
+"""
+Timeline match-v5 (/lol/match/v5/matches/{id}/timeline) lue en flux.
+
+Une timeline pèse plusieurs fois le match : on ne la charge jamais en entier.
+Les frames sont décodées une par une et on s'arrête dès qu'on a les minutes
+voulues et le premier kill. Résumé gardé en base :
+    {"first_blood_ms": 184000, "frames": {"10": {"1": [gold, xp, cs], ...}, "15": {...}}}
+"""
+import codecs
+import json
+
+try:
+    import ijson # Optionnel : parseur incrémental en C, plus rapide que le repli ci-dessous
+except ImportError:
+    ijson = None
+
+TIMELINE_MINUTES = (10, 15)
+CHUNK_SIZE = 64 * 1024 # Octets lus à la fois sur la réponse HTTP
+
+def iter_frames(stream):
+    """Frames de info.frames, une par une, depuis un flux binaire (response.raw)"""
+    if ijson:
+        yield from ijson.items(stream, "info.frames.item", use_float=True)
+        return
+
+    # Repli sans dépendance : on cherche la liste "frames" puis on décode
+    # chaque frame avec raw_decode dès qu'elle est entièrement dans le buffer.
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, in_frames, eof = "", 0, False, False
+    while True:
+        if not in_frames:
+            start = buf.find('"frames"')
+            if start != -1:
+                bracket = buf.find("[", start)
+                if bracket != -1:
+                    buf, pos, in_frames = buf[bracket + 1:], 0, True
+                    continue
+        else:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos += 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            if pos < len(buf):
+                try:
+                    frame, end = decoder.raw_decode(buf, pos)
+                except json.JSONDecodeError:
+                    if eof: raise
+                else:
+                    yield frame
+                    buf, pos = buf[end:], 0 # Le buffer ne garde jamais plus d'une frame
+                    continue
+        if eof:
+            if in_frames: raise ValueError("Timeline tronquée")
+            return
+        chunk = stream.read(CHUNK_SIZE)
+        eof = not chunk
+        buf += utf8.decode(chunk or b"", final=eof)
+
+def parse_timeline(stream):
+    """Flux de la timeline -> résumé (frames des TIMELINE_MINUTES + premier kill)"""
+    summary = {"first_blood_ms": None, "frames": {}}
+    targets = list(TIMELINE_MINUTES)
+    for frame in iter_frames(stream):
+        while targets and frame.get("timestamp", 0) >= targets[0] * 60000:
+            summary["frames"][str(targets.pop(0))] = {
+                pid: [p.get("totalGold", 0), p.get("xp", 0),
+                      p.get("minionsKilled", 0) + p.get("jungleMinionsKilled", 0)]
+                for pid, p in frame.get("participantFrames", {}).items()
+            }
+        if summary["first_blood_ms"] is None:
+            kill = next((e for e in frame.get("events", []) if e.get("type") == "CHAMPION_KILL"), None)
+            if kill: summary["first_blood_ms"] = kill["timestamp"]
+        if not targets and summary["first_blood_ms"] is not None:
+            break # Le reste de la partie ne nous intéresse pas
+    return summary
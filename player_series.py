@@ -0,0 +1,159 @@
+"""
+Séries de forme par joueur (PUUID) : moyennes glissantes sur 10 / 20 games et cumuls,
+une ligne par partie, tenues à jour par Fetch_data au fil des nouveaux matchs.
+
+Chaque ligne garde aussi les valeurs brutes de sa partie : une mise à jour ne relit
+que les MAX_WINDOW - 1 parties précédentes et le cumul de la dernière, jamais l'historique.
+Un match plus ancien que la dernière ligne (reprise d'un run, nouveau filtre de files)
+ne fait recalculer que les lignes qui le suivent. app.py lit les séries telles quelles.
+"""
+import sqlite3
+import threading
+
+import pandas as pd
+
+from match_store import BUSY_TIMEOUT
+
+SERIES_PATH = "player_series.db"
+WINDOWS = (10, 20) # Parties par fenêtre glissante
+MAX_WINDOW = max(WINDOWS)
+RAW_FIELDS = ("win", "dpm", "cs_min", "kills", "deaths", "assists") # Valeurs de la partie, recopiées de l'entrée
+SUM_FIELDS = tuple(f"sum_{f}" for f in RAW_FIELDS)
+ROLLING_STATS = ("winrate", "dpm", "cs_min", "kda")
+ROLLING_COLUMNS = tuple(f"{stat}_{w}" for w in WINDOWS for stat in ROLLING_STATS)
+STORED_COLUMNS = ("game_date", "match_id") + RAW_FIELDS + ("games",) + SUM_FIELDS + ROLLING_COLUMNS
+
+# Colonnes renvoyées par series() / latest() : fenêtres puis cumul ("all", calculé depuis les sommes)
+SERIES_COLUMNS = ("player", "game_date", "match_id", "games") + ROLLING_COLUMNS + tuple(
+    f"{stat}_all" for stat in ROLLING_STATS
+)
+_SELECT = f"""
+    SELECT sp.player, s.game_date, s.match_id, s.games, {", ".join(f"s.{c}" for c in ROLLING_COLUMNS)},
+           ROUND(100.0 * s.sum_win / s.games, 1), ROUND(s.sum_dpm / s.games, 1), ROUND(s.sum_cs_min / s.games, 2),
+           ROUND((s.sum_kills + s.sum_assists) * 1.0 / MAX(s.sum_deaths, 1), 2)
+    FROM series_players sp JOIN player_series s ON s.puuid = sp.puuid
+"""
+
+def rolling_frame(prefix, rows, base):
+    """
+    prefix : parties déjà en base juste avant rows (au plus MAX_WINDOW - 1), pour remplir les fenêtres ;
+    rows : parties à (re)calculer, triées ; base : (games, sommes...) de la dernière ligne de prefix.
+    Renvoie les lignes de rows complétées (cumuls + fenêtres), dans l'ordre de STORED_COLUMNS.
+    """
+    df = pd.DataFrame(prefix + rows, columns=("game_date", "match_id") + RAW_FIELDS)
+    raw = df.loc[:, list(RAW_FIELDS)].astype("float64")
+    for w in WINDOWS:
+        window = raw.rolling(w, min_periods=1)
+        sums, count = window.sum(), window.count()["win"]
+        df[f"winrate_{w}"] = (100 * sums["win"] / count).round(1)
+        df[f"dpm_{w}"] = (sums["dpm"] / count).round(1)
+        df[f"cs_min_{w}"] = (sums["cs_min"] / count).round(2)
+        df[f"kda_{w}"] = ((sums["kills"] + sums["assists"]) / sums["deaths"].clip(lower=1)).round(2)
+
+    df = df.iloc[len(prefix):].reset_index(drop=True)
+    df["games"] = base[0] + pd.RangeIndex(1, len(df) + 1)
+    cumulative = raw.iloc[len(prefix):].reset_index(drop=True).cumsum()
+    for i, field in enumerate(RAW_FIELDS):
+        df[f"sum_{field}"] = cumulative[field] + base[i + 1]
+    return df.loc[:, list(STORED_COLUMNS)]
+
+class PlayerSeries:
+    """Stockage SQLite des séries, écrit par Fetch_data (plusieurs process possibles) et lu par app.py"""
+    def __init__(self, path=SERIES_PATH):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=BUSY_TIMEOUT, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(f"""
+            -- Nom affiché par PUUID (app.py sélectionne les joueurs par nom)
+            CREATE TABLE IF NOT EXISTS series_players (
+                puuid  TEXT PRIMARY KEY,
+                player TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_series_players_player ON series_players (player);
+
+            -- Une ligne par partie, rangées par joueur puis date (WITHOUT ROWID : la table est l'index)
+            CREATE TABLE IF NOT EXISTS player_series (
+                puuid     TEXT NOT NULL,
+                game_date INTEGER NOT NULL,
+                match_id  TEXT NOT NULL,
+                {", ".join(f"{c} REAL" for c in STORED_COLUMNS[2:])},
+                PRIMARY KEY (puuid, game_date, match_id)
+            ) WITHOUT ROWID;
+        """)
+
+    def set_players(self, players):
+        """players : {puuid: "Nom#Tag"} (un renommage est repris tout de suite)"""
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO series_players (puuid, player) VALUES (?, ?)",
+                                  list(players.items()))
+
+    def has_player(self, puuid):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM player_series WHERE puuid = ? LIMIT 1", (puuid,)).fetchone() is not None
+
+    def add_games(self, puuid, games):
+        """
+        games : entrées de match (match_frame.ENTRY_COLUMNS), dans n'importe quel ordre.
+        Met à jour la série en une transaction, renvoie le nombre de parties ajoutées.
+        """
+        new = {g["match_id"]: (g["game_date"], g["match_id"], *(g[f] for f in RAW_FIELDS)) for g in games}
+        if not new: return 0
+        start = min(row[0] for row in new.values())
+        raw_columns = ", ".join(("game_date", "match_id") + RAW_FIELDS)
+        with self.lock:
+            # IMMEDIATE : deux workers qui ajoutent des parties au même joueur passent l'un après l'autre
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Lignes déjà en base à partir du plus ancien nouveau match : à recalculer (en général aucune)
+                after = self.conn.execute(
+                    f"SELECT {raw_columns} FROM player_series WHERE puuid = ? AND game_date >= ?", (puuid, start)
+                ).fetchall()
+                added = len(new.keys() - {row[1] for row in after})
+                if added:
+                    rows = sorted({**{row[1]: row for row in after}, **new}.values())
+                    prefix = self.conn.execute(
+                        f"SELECT {raw_columns}, games, {', '.join(SUM_FIELDS)} FROM player_series "
+                        "WHERE puuid = ? AND game_date < ? ORDER BY game_date DESC, match_id DESC LIMIT ?",
+                        (puuid, start, MAX_WINDOW - 1)
+                    ).fetchall()[::-1]
+                    base = prefix[-1][len(RAW_FIELDS) + 2:] if prefix else (0,) * (len(RAW_FIELDS) + 1)
+                    df = rolling_frame([row[:len(RAW_FIELDS) + 2] for row in prefix], rows, base)
+                    self.conn.executemany(
+                        f"INSERT OR REPLACE INTO player_series (puuid, {', '.join(STORED_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' * (len(STORED_COLUMNS) + 1))})",
+                        [(puuid, *row) for row in df.itertuples(index=False)]
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return added
+
+    def reset(self):
+        """Vide les séries (après --reextract, elles sont reconstruites depuis la base)"""
+        with self.lock:
+            self.conn.execute("DELETE FROM player_series")
+
+    def series(self, players, start_ts=None):
+        """Lignes des joueurs demandés (noms) depuis start_ts, dans l'ordre de SERIES_COLUMNS"""
+        marks = ",".join("?" * len(players))
+        with self.lock:
+            return self.conn.execute(
+                f"{_SELECT} WHERE sp.player IN ({marks}) AND s.game_date >= ? ORDER BY sp.player, s.game_date, s.match_id",
+                (*players, start_ts or 0)
+            ).fetchall()
+
+    def latest(self, players):
+        """Dernière ligne de chaque joueur demandé : sa forme actuelle"""
+        marks = ",".join("?" * len(players))
+        with self.lock:
+            return self.conn.execute(f"""
+                {_SELECT} WHERE sp.player IN ({marks}) AND (s.game_date, s.match_id) = (
+                    SELECT game_date, match_id FROM player_series WHERE puuid = sp.puuid
+                    ORDER BY game_date DESC, match_id DESC LIMIT 1)
+                ORDER BY sp.player
+            """, players).fetchall()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,179 @@
+"""
+Métriques des requêtes Riot, par endpoint : latences (histogramme), codes HTTP,
+429 et Retry-After, attente de budget, octets reçus, + durée des phases des scripts.
+
+Exportées dans metrics/<script>.json (lu par la page "Métriques" de app.py)
+et metrics/<script>.prom (format texte Prometheus, pour node_exporter --collector.textfile).
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+METRICS_DIR = "metrics"
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10) # Secondes, + une case "au-delà"
+
+class RequestMetrics:
+    """Compteurs thread-safe, alimentés par RiotClient et par les fetchers (phases)"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.endpoints = {} # (host, méthode) -> compteurs
+        self.phases = {}    # nom -> secondes
+        self.priorities = {} # classe de priorité -> attente du budget (tentatives, total, max)
+
+    def _endpoint(self, host, method):
+        key = (host, method)
+        if key not in self.endpoints:
+            self.endpoints[key] = {
+                "requests": 0,
+                "status": {},
+                "latency_buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+                "latency_sum": 0.0,
+                "bytes": 0,
+                "rate_limited": 0,       # 429 reçus
+                "retry_after_sleep": 0.0, # Pauses imposées par Retry-After
+                "throttle_wait": 0.0,    # Attente de notre propre budget (RateLimiter)
+                "backoff_sleep": 0.0,    # Backoff après erreur réseau / 5xx / 429 sans Retry-After
+            }
+        return self.endpoints[key]
+
+    def record_response(self, host, method, status, latency, size=0):
+        """Une tentative HTTP terminée (status None = erreur réseau)"""
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS) if latency <= bound), len(LATENCY_BUCKETS))
+        status = str(status) if status is not None else "error"
+        with self.lock:
+            e = self._endpoint(host, method)
+            e["requests"] += 1
+            e["status"][status] = e["status"].get(status, 0) + 1
+            e["latency_buckets"][bucket] += 1
+            e["latency_sum"] += latency
+            e["bytes"] += size
+
+    def record_429(self, host, method, retry_after):
+        with self.lock:
+            e = self._endpoint(host, method)
+            e["rate_limited"] += 1
+            e["retry_after_sleep"] += retry_after or 0
+
+    def record_wait(self, host, method, seconds, kind="throttle_wait"):
+        """kind : "throttle_wait" ou "backoff_sleep" """
+        with self.lock:
+            self._endpoint(host, method)[kind] += seconds
+
+    def record_priority_wait(self, priority, seconds):
+        """Attente du budget d'une tentative, par classe de priorité (voir riot_client.PRIORITIES)"""
+        with self.lock:
+            p = self.priorities.setdefault(priority, {"requests": 0, "wait_sum": 0.0, "wait_max": 0.0})
+            p["requests"] += 1
+            p["wait_sum"] += seconds
+            p["wait_max"] = max(p["wait_max"], seconds)
+
+    @contextmanager
+    def phase(self, name):
+        """with metrics.phase("export"): ...  -> temps passé dans notre propre code/IO"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                self.phases[name] = self.phases.get(name, 0.0) + elapsed
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "updated": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "started": datetime.fromtimestamp(self.started).strftime("%Y-%m-%d %H:%M:%S"),
+                "uptime_s": round(time.time() - self.started, 2),
+                "latency_buckets": list(LATENCY_BUCKETS),
+                "phases": {name: round(s, 3) for name, s in self.phases.items()},
+                "priorities": {name: dict(p, wait_sum=round(p["wait_sum"], 3), wait_max=round(p["wait_max"], 3))
+                               for name, p in self.priorities.items()},
+                "endpoints": [
+                    dict(e, host=host, method=method, status=dict(e["status"]), latency_buckets=list(e["latency_buckets"]))
+                    for (host, method), e in sorted(self.endpoints.items())
+                ],
+            }
+
+    def to_prometheus(self):
+        snap = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_str = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_str}}} {value}" if label_str else f"{name} {value}")
+
+        eps = snap["endpoints"]
+        labels = [{"host": e["host"], "endpoint": e["method"]} for e in eps]
+        metric("riot_requests_total", "counter", "Requêtes HTTP par code de retour",
+               [(dict(l, status=s), n) for l, e in zip(labels, eps) for s, n in sorted(e["status"].items())])
+
+        lines.append("# HELP riot_request_duration_seconds Latence des requêtes HTTP")
+        lines.append("# TYPE riot_request_duration_seconds histogram")
+        for l, e in zip(labels, eps):
+            label_str = f'host="{l["host"]}",endpoint="{l["endpoint"]}"'
+            cumulative = 0
+            for bound, n in zip(list(LATENCY_BUCKETS) + ["+Inf"], e["latency_buckets"]):
+                cumulative += n
+                lines.append(f'riot_request_duration_seconds_bucket{{{label_str},le="{bound}"}} {cumulative}')
+            lines.append(f"riot_request_duration_seconds_sum{{{label_str}}} {e['latency_sum']:.4f}")
+            lines.append(f"riot_request_duration_seconds_count{{{label_str}}} {e['requests']}")
+
+        for name, field, help_text in (
+            ("riot_response_bytes_total", "bytes", "Octets reçus"),
+            ("riot_rate_limited_total", "rate_limited", "Réponses 429"),
+            ("riot_retry_after_seconds_total", "retry_after_sleep", "Pauses imposées par Retry-After"),
+            ("riot_throttle_wait_seconds_total", "throttle_wait", "Attente du budget local"),
+            ("riot_backoff_seconds_total", "backoff_sleep", "Backoff après erreur"),
+        ):
+            metric(name, "counter", help_text, [(l, round(e[field], 4)) for l, e in zip(labels, eps)])
+
+        metric("riot_priority_wait_seconds_total", "counter", "Attente du budget par classe de priorité",
+               [({"priority": name}, p["wait_sum"]) for name, p in snap["priorities"].items()])
+        metric("riot_priority_wait_max_seconds", "gauge", "Plus longue attente du budget par classe de priorité",
+               [({"priority": name}, p["wait_max"]) for name, p in snap["priorities"].items()])
+        metric("fetch_phase_seconds", "counter", "Temps passé par phase du script",
+               [({"phase": name}, s) for name, s in snap["phases"].items()])
+        metric("fetch_uptime_seconds", "gauge", "Durée depuis le démarrage", [({}, snap["uptime_s"])])
+        return "\n".join(lines) + "\n"
+
+    def export(self, name, directory=METRICS_DIR):
+        """Écrit <directory>/<name>.json et <name>.prom (écriture atomique)"""
+        os.makedirs(directory, exist_ok=True)
+        for ext, content in (("json", json.dumps(self.snapshot(), indent=4)), ("prom", self.to_prometheus())):
+            path = os.path.join(directory, f"{name}.{ext}")
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+        return os.path.join(directory, f"{name}.json")
+
+def histogram_quantile(buckets, counts, q):
+    """Quantile approché (borne haute de la case), comme histogram_quantile de Prometheus"""
+    total = sum(counts)
+    if not total: return None
+    rank = q * total
+    cumulative = 0
+    for bound, n in zip(list(buckets) + [float("inf")], counts):
+        cumulative += n
+        if cumulative >= rank:
+            return bound
+    return float("inf")
+
+def load_exported(directory=METRICS_DIR):
+    """{nom du script: snapshot} pour tous les exports présents"""
+    results = {}
+    if not os.path.isdir(directory): return results
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"): continue
+        try:
+            with open(os.path.join(directory, filename), "r", encoding="utf-8") as f:
+                results[filename[:-5]] = json.load(f)
+        except (OSError, ValueError):
+            continue
+    return results
@@ -0,0 +1,327 @@
+import requests
+import time
+import random
+import os
+import itertools
+import threading
+from collections import deque
+from concurrent.futures import Future
+from urllib.parse import urlparse
+from dotenv import load_dotenv
+
+from request_metrics import RequestMetrics
+
+load_dotenv() # Charge le fichier .env
+API_KEY = os.getenv("RIOT_API_KEY")
+# Plusieurs clés (RIOT_API_KEYS=clé1,clé2) : une par process worker, chacune avec son propre budget
+API_KEYS = [k.strip() for k in os.getenv("RIOT_API_KEYS", "").split(",") if k.strip()] or [API_KEY]
+
+POOL_SIZE = 20      # Connexions keep-alive par host (europe, asia, euw1, kr...)
+MAX_RETRIES = 4     # Tentatives sur erreur réseau / 5xx / 429 sans Retry-After
+BACKOFF_BASE = 1.0  # Secondes, doublé à chaque tentative (+ jitter)
+
+# Classes de priorité, de la plus urgente à la moins urgente
+PRIORITIES = {"interactive": 0, "live": 1, "ladder": 2, "backfill": 3}
+DEFAULT_PRIORITY = "ladder"
+# Part de chaque fenêtre utilisable par une classe : le reste est réservé aux classes au-dessus,
+# y compris quand elles viennent d'un autre process sur la même clé (dashboard pendant un Fetch_data)
+PRIORITY_SHARE = {"interactive": 1.0, "live": 1.0, "ladder": 0.9, "backfill": 0.8}
+AGING_SECONDS = 10 # Une requête qui attend depuis N x AGING_SECONDS remonte de N classes (pas de famine)
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Python Script)",
+    "X-Riot-Token": API_KEY
+}
+
+class RateLimiter:
+    """
+    Budget de requêtes calé sur les headers Riot (format "20:1,100:120").
+    Chaque fenêtre garde l'horodatage des requêtes envoyées : on ne dépasse
+    jamais N requêtes sur T secondes, quelle que soit la façon dont Riot découpe ses fenêtres.
+    share : part du budget de la clé réservée à ce process (1/N si N workers partagent la clé).
+
+    Les requêtes en attente passent par ordre de priorité (PRIORITIES), puis d'arrivée :
+    seule la première de la file peut prendre un créneau. Une requête qui attend
+    remonte d'une classe toutes les AGING_SECONDS.
+    """
+    def __init__(self, limits="20:1,100:120", share=1.0):
+        self.lock = threading.Lock()
+        self.ready = threading.Condition(self.lock) # Signalé quand la tête de file change
+        self.windows = {}       # période (s) -> [limite, deque d'horodatages]
+        self.paused_until = 0.0 # Posé par un 429 (Retry-After)
+        self.share = share
+        self.waiters = []       # [classe, arrivée, n° d'ordre] des requêtes en attente
+        self.order = itertools.count()
+        self.update_limits(limits)
+
+    @staticmethod
+    def parse(header):
+        """ "20:1,100:120" -> [(20, 1), (100, 120)] """
+        pairs = []
+        for chunk in (header or "").split(","):
+            if ":" not in chunk: continue
+            count, period = chunk.split(":")
+            pairs.append((int(count), int(period)))
+        return pairs
+
+    def update_limits(self, limits_header, counts_header=None):
+        limits = self.parse(limits_header)
+        if not limits: return
+        counts = dict((period, count) for count, period in self.parse(counts_header))
+        now = time.monotonic()
+        with self.lock:
+            old = self.windows
+            self.windows = {}
+            for limit, period in limits:
+                stamps = old[period][1] if period in old else deque()
+                # Riot a compté plus que nous (autre script sur la même clé) : on se recale.
+                # Avec une part du budget, chaque worker absorbe sa part de cet excédent.
+                missing = int(counts.get(period, 0) * self.share) - len(stamps)
+                stamps.extend([now] * max(missing, 0))
+                self.windows[period] = [max(int(limit * self.share), 1), stamps]
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def _slot_wait(self, now, class_share):
+        """Secondes avant un créneau libre pour une classe qui a droit à class_share de chaque fenêtre"""
+        wait = self.paused_until - now
+        for period, (limit, stamps) in self.windows.items():
+            while stamps and stamps[0] <= now - period:
+                stamps.popleft()
+            allowed = max(int(limit * class_share), 1)
+            if len(stamps) >= allowed:
+                wait = max(wait, stamps[len(stamps) - allowed] + period - now)
+        return wait
+
+    def _head(self, now):
+        """Requête servie en premier : classe diminuée de l'ancienneté, puis ordre d'arrivée"""
+        return min(self.waiters, key=lambda w: (w[0] - (now - w[1]) / AGING_SECONDS, w[2]))
+
+    def acquire(self, priority=DEFAULT_PRIORITY):
+        """Bloque jusqu'à ce qu'un créneau soit libre dans toutes les fenêtres et que ce soit notre tour"""
+        ticket = [PRIORITIES[priority], time.monotonic(), next(self.order)]
+        with self.lock:
+            self.waiters.append(ticket)
+            self.ready.notify_all() # Une requête plus prioritaire peut devenir la tête de file
+            try:
+                while True:
+                    now = time.monotonic()
+                    if self._head(now) is not ticket:
+                        # Réévalué régulièrement : l'ancienneté peut changer l'ordre
+                        self.ready.wait(AGING_SECONDS / 40)
+                        continue
+                    wait = self._slot_wait(now, PRIORITY_SHARE[priority])
+                    if wait <= 0:
+                        for _, stamps in self.windows.values():
+                            stamps.append(now)
+                        return
+                    self.ready.wait(wait + 0.01)
+            finally:
+                self.waiters.remove(ticket)
+                self.ready.notify_all()
+
+class RiotClient:
+    """
+    Client HTTP unique pour tous les scripts (Fetch_data, Fetch_LeaderBoard, app.py).
+    - une Session keep-alive par host de routing
+    - un budget "app" par host et un budget par (host, méthode)
+    - retries avec backoff exponentiel + jitter
+    - deux appels identiques simultanés ne font qu'une seule requête
+    budget_share : part des limites de la clé pour ce process (workers de Fetch_data --workers)
+    """
+    def __init__(self, headers=HEADERS, base_url=None, budget_share=1.0):
+        self.headers = headers
+        self.budget_share = budget_share
+        # Redirige toutes les requêtes (ex: serveur mock de bench/), None = vraie API Riot
+        self.base_url = base_url.rstrip("/") if base_url else None
+        self.lock = threading.Lock()
+        self.sessions = {}       # host -> requests.Session
+        self.app_limiters = {}   # host -> RateLimiter
+        self.method_limiters = {} # (host, method) -> RateLimiter
+        self.in_flight = {}      # ((url, params, parse), priorité) -> Future
+        self.waiting = dict.fromkeys(PRIORITIES, 0) # Requêtes en attente de budget, par classe
+        self.metrics = RequestMetrics()
+
+    def _session(self, host):
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self.sessions[host] = session
+            return self.sessions[host]
+
+    def _limiters(self, host, method):
+        with self.lock:
+            if host not in self.app_limiters:
+                self.app_limiters[host] = RateLimiter(share=self.budget_share)
+            if (host, method) not in self.method_limiters:
+                # Pas de limite connue tant que Riot ne nous l'a pas donnée
+                self.method_limiters[(host, method)] = RateLimiter("", self.budget_share)
+            return self.app_limiters[host], self.method_limiters[(host, method)]
+
+    def fetch(self, url, params=None, method=None, parse=None, priority=DEFAULT_PRIORITY):
+        """
+        Renvoie (status_code, json ou None). status_code vaut None si le réseau a lâché.
+        parse : fonction appelée sur le flux de la réponse (200) au lieu de tout charger
+        en mémoire avec .json() ; son résultat remplace le JSON.
+        priority : classe de PRIORITIES (interactive > live > ladder > backfill).
+        """
+        request = (url, tuple(sorted((params or {}).items())), parse)
+        key = (request, priority)
+        with self.lock:
+            # On ne rejoint qu'une requête identique de priorité égale ou supérieure : un appel
+            # "interactive" n'attend jamais derrière un "backfill" encore dans la file du limiteur
+            future = next((self.in_flight[(request, p)] for p in PRIORITIES
+                           if PRIORITIES[p] <= PRIORITIES[priority] and (request, p) in self.in_flight), None)
+            owner = future is None
+            if owner:
+                future = Future()
+                self.in_flight[key] = future
+        if not owner:
+            return future.result()
+
+        try:
+            result = self._fetch(url, params, method, parse, priority)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self.lock:
+                del self.in_flight[key]
+
+    def _fetch(self, url, params, method, parse=None, priority=DEFAULT_PRIORITY):
+        host = urlparse(url).netloc
+        method = method or urlparse(url).path.rsplit("/", 1)[0]
+        session = self._session(host)
+        app_limiter, method_limiter = self._limiters(host, method)
+
+        attempt = 0
+        while True:
+            with self.lock: self.waiting[priority] += 1
+            wait_start = time.perf_counter()
+            try:
+                app_limiter.acquire(priority)
+                method_limiter.acquire(priority)
+            finally:
+                with self.lock: self.waiting[priority] -= 1
+                waited = time.perf_counter() - wait_start
+                self.metrics.record_wait(host, method, waited)
+                self.metrics.record_priority_wait(priority, waited)
+            start = time.perf_counter()
+            try:
+                response = session.get(self._target(url), params=params, stream=parse is not None)
+            except requests.RequestException as e:
+                self.metrics.record_response(host, method, None, time.perf_counter() - start)
+                if attempt >= MAX_RETRIES:
+                    print(f"   ❌ Exception: {e}")
+                    return None, None
+                self._backoff(host, method, attempt)
+                attempt += 1
+                continue
+            streamed = parse is not None and response.status_code == 200
+            size = int(response.headers.get("Content-Length") or 0) if streamed else len(response.content)
+            self.metrics.record_response(host, method, response.status_code, time.perf_counter() - start, size)
+
+            # On lit le budget réel de la clé à chaque réponse
+            app_limiter.update_limits(response.headers.get("X-App-Rate-Limit"),
+                                      response.headers.get("X-App-Rate-Limit-Count"))
+            method_limiter.update_limits(response.headers.get("X-Method-Rate-Limit"),
+                                         response.headers.get("X-Method-Rate-Limit-Count"))
+
+            if response.status_code == 200:
+                if not streamed:
+                    return 200, response.json()
+                try:
+                    response.raw.decode_content = True # gzip décompressé à la volée
+                    return 200, parse(response.raw)
+                except Exception as e: # Connexion coupée / JSON tronqué en cours de lecture
+                    if attempt >= MAX_RETRIES:
+                        print(f"   ❌ Lecture interrompue : {e}")
+                        return None, None
+                    self._backoff(host, method, attempt)
+                    attempt += 1
+                    continue
+                finally:
+                    response.close() # Libère la connexion (fermée si on s'est arrêté avant la fin)
+            elif response.status_code == 429:
+                retry_after = response.headers.get("Retry-After")
+                self.metrics.record_429(host, method, int(retry_after) if retry_after else 0)
+                if retry_after is None:
+                    # 429 "service" (sans Retry-After) : on recule progressivement
+                    if attempt >= MAX_RETRIES: return 429, None
+                    self._backoff(host, method, attempt)
+                    attempt += 1
+                    continue
+                wait = int(retry_after)
+                print(f"   ⚠️ Pause Riot : {wait}s...")
+                # Tous les threads du même budget s'arrêtent, pas seulement celui qui a pris le 429
+                if response.headers.get("X-Rate-Limit-Type") == "method":
+                    method_limiter.pause(wait)
+                else:
+                    app_limiter.pause(wait)
+            elif response.status_code >= 500 and attempt < MAX_RETRIES:
+                self._backoff(host, method, attempt)
+                attempt += 1
+            else:
+                if response.status_code != 404:
+                    print(f"   ❌ Erreur {response.status_code} sur {url}")
+                return response.status_code, None
+
+    def _target(self, url):
+        """https://euw1.api.riotgames.com/lol/... -> {base_url}/euw1/lol/... si base_url est défini"""
+        if not self.base_url: return url
+        parsed = urlparse(url)
+        return f"{self.base_url}/{parsed.netloc.split('.')[0]}{parsed.path}"
+
+    def _backoff(self, host, method, attempt):
+        delay = BACKOFF_BASE * (2 ** attempt) * random.uniform(0.5, 1.5)
+        self.metrics.record_wait(host, method, delay, "backoff_sleep")
+        time.sleep(delay)
+
+    def stats(self):
+        """État instantané du client (pour le daemon / le monitoring)"""
+        with self.lock:
+            return {"in_flight": len(self.in_flight), "waiting": dict(self.waiting), "hosts": sorted(self.sessions)}
+
+    def get_json(self, url, params=None, method=None, priority=DEFAULT_PRIORITY):
+        """Raccourci : le JSON si 200, sinon None (404, erreur, etc.)"""
+        status, data = self.fetch(url, params, method, priority=priority)
+        return data if status == 200 else None
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """Client partagé par tout le process (même pool, même budget)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = RiotClient(base_url=os.getenv("RIOT_API_BASE_URL"))
+        return _client
+
+def configure_client(api_key=None, budget_share=1.0):
+    """
+    Remplace le client partagé du process : à appeler au démarrage d'un process worker,
+    avant toute requête. api_key None = clé du .env.
+    """
+    global _client
+    headers = dict(HEADERS, **{"X-Riot-Token": api_key}) if api_key else HEADERS
+    with _client_lock:
+        _client = RiotClient(headers, os.getenv("RIOT_API_BASE_URL"), budget_share)
+        return _client
+
+def split_budget(workers, keys=None):
+    """
+    Répartit les clés entre N workers : [(clé, part du budget)] par worker.
+    Le worker i prend la clé i % len(keys) ; les workers d'une même clé se partagent ses limites.
+    """
+    keys = keys or API_KEYS
+    per_key = [sum(1 for w in range(workers) if w % len(keys) == k) for k in range(len(keys))]
+    return [(keys[w % len(keys)], 1 / per_key[w % len(keys)]) for w in range(workers)]
@@ -0,0 +1,58 @@
+"""
+Rosters suivis, lus depuis rosters.json :
+
+    {
+        "rosters": [
+            {"name": "Équipe A", "priority": 0, "players": ["Joueur#EUW", {"gameName": "Autre", "tagLine": "EUW"}]},
+            {"name": "Académie", "priority": 1, "players": ["..."]}
+        ]
+    }
+
+priority : plus petit = traité en premier (défaut : ordre du fichier).
+Sans fichier, on retombe sur TEAM_PLAYERS de Fetch_data.py (un seul roster).
+"""
+import json
+import os
+
+ROSTERS_FILE = "rosters.json"
+DEFAULT_ROSTER = "Roster" # Nom du roster unique quand il n'y a pas de fichier
+ROSTER_SLICE = 10 # Joueurs max par élément de la file (un gros roster est découpé entre les workers)
+
+def parse_player(player):
+    """ "Nom#Tag" ou {"gameName", "tagLine"} -> {"gameName", "tagLine"} """
+    if isinstance(player, str):
+        game_name, _, tag_line = player.rpartition("#")
+        if not game_name: raise ValueError(f"Joueur sans #Tag dans {ROSTERS_FILE} : {player!r}")
+        return {"gameName": game_name, "tagLine": tag_line}
+    return {"gameName": player["gameName"], "tagLine": player["tagLine"]}
+
+def load_rosters(path=ROSTERS_FILE, default_players=()):
+    """Liste de {"name", "priority", "players"} triée par priorité"""
+    if not os.path.exists(path):
+        return [{"name": DEFAULT_ROSTER, "priority": 0, "players": list(default_players)}] if default_players else []
+    with open(path, "r", encoding="utf-8") as f:
+        config = json.load(f)
+    rosters = [
+        {"name": r["name"], "priority": r.get("priority", i), "players": [parse_player(p) for p in r.get("players", [])]}
+        for i, r in enumerate(config.get("rosters", []))
+    ]
+    return sorted(rosters, key=lambda r: r["priority"]) # sorted est stable : ordre du fichier à priorité égale
+
+def full_name(player):
+    return f"{player['gameName']}#{player['tagLine']}"
+
+def work_queue(rosters, slice_size=ROSTER_SLICE):
+    """
+    File de travail, par ordre de priorité : un élément = un roster (ou un morceau de
+    slice_size joueurs). Les joueurs d'un même roster restent ensemble autant que possible,
+    pour que leurs parties communes ne soient téléchargées qu'une fois.
+    Un joueur présent dans plusieurs rosters n'est traité qu'avec le plus prioritaire.
+    """
+    seen = set()
+    queue = []
+    for roster in rosters:
+        players = [p for p in roster["players"] if full_name(p) not in seen]
+        seen.update(full_name(p) for p in players)
+        for start in range(0, len(players), slice_size):
+            queue.append(dict(roster, players=players[start:start + slice_size]))
+    return queue
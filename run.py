@@ -1,29 +1,63 @@
 import subprocess
 import sys
 import os
+import threading
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Scripts lancés en arrière-plan, en parallèle du dashboard
+FETCHERS = [
+    ("📥 Stats Riot", "Fetch_data.py", "fetch_data.log"),
+    ("🌍 Ladder", "Fetch_LeaderBoard.py", "fetch_leaderboard.log"),
+]
+
+def start_fetchers():
+    """Lance tous les fetchers en même temps (logs dans des fichiers pour ne pas polluer la console)"""
+    procs = []
+    for label, script, log_name in FETCHERS:
+        log_file = open(os.path.join(BASE_DIR, log_name), "w", encoding="utf-8")
+        proc = subprocess.Popen(
+            [sys.executable, script], cwd=BASE_DIR,
+            stdout=log_file, stderr=subprocess.STDOUT
+        )
+        print(f"   {label} : démarré en arrière-plan (log : {log_name})")
+        procs.append((label, proc, log_file))
+    return procs
+
+def watch_fetcher(label, proc, log_file):
+    """Affiche la fin d'un fetcher dès qu'elle arrive. Le dashboard recharge tout seul les nouveaux fichiers."""
+    code = proc.wait()
+    log_file.close()
+    if code == 0:
+        print(f"\n✅ {label} : données à jour, le dashboard va les recharger.")
+    else:
+        print(f"\n❌ {label} : erreur (code {code}), le dashboard garde les données précédentes.")
+
+def watch_fetchers(procs):
+    """Un thread par fetcher : le plus rapide est annoncé sans attendre les autres"""
+    for label, proc, log_file in procs:
+        threading.Thread(target=watch_fetcher, args=(label, proc, log_file), daemon=True,
+                         name=f"watch-{label}").start()
 
 def main():
     print("🚀 INITIALISATION DU DASHBOARD ESPORT...")
 
-    # 1. Lancer le script de récupération de données
-    print("\n[1/2] 📥 Récupération des dernières données Riot...")
+    # 1. Les récupérations tournent en fond : rien n'attend Riot pour afficher le dashboard
+    print("\n[1/2] 📥 Récupération des dernières données Riot (en arrière-plan)...")
     # On utilise sys.executable pour être sûr d'utiliser le même python que l'environnement actuel
+    procs = start_fetchers()
+    watch_fetchers(procs)
+
+    # 2. Le dashboard démarre tout de suite sur les dernières données publiées
+    print("\n[2/2] 📊 Lancement Web...")
     try:
-        # check=True arrête tout si Fetch_data plante
-        subprocess.run([sys.executable, "dev/Fetch_data.py"], check=True)
-    except subprocess.CalledProcessError:
-        print("❌ Erreur lors de la récupération des données. Arrêt.")
-        return
-
-    print("\n[2/3] 🌍 Récupération du Ladder EUW/KR...")
-    subprocess.run([sys.executable, "dev/Fetch_leaderboard.py"], check=False) # check=False pour ne pas bloquer si erreur réseau
-    
-    print("\n[3/3] 📊 Lancement Web...")
-    # ...
-    try:
-        subprocess.run([sys.executable, "-m", "streamlit", "run", "app.py"])
+        subprocess.run([sys.executable, "-m", "streamlit", "run", "app.py"], cwd=BASE_DIR)
     except KeyboardInterrupt:
         print("\n👋 Fermeture du dashboard.")
+    finally:
+        # Les fetchers reprennent là où ils en étaient au prochain lancement
+        for _, proc, _ in procs:
+            if proc.poll() is None: proc.terminate()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()